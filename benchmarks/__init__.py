@@ -0,0 +1,14 @@
+"""
+Benchmarks of the game engine, inference, breeding and league play
+
+Run as a script to measure every benchmark and optionally compare the
+results to a saved baseline
+```
+python -m benchmarks -o results.json --baseline baseline.json
+```
+
+Modules
+-------
+suite
+	the benchmarks and the functions that run and compare them
+"""
@@ -0,0 +1,64 @@
+"""
+Connect Four Benchmarks
+
+Measures the speed of the game engine, neural network inference, 
+breeding and league play, and compares the results to a baseline.
+Exits with status 1 if any benchmark regressed beyond the threshold
+
+'Numpy' is required to be installed on the python environment\
+ on which this script is running
+ """
+
+import argparse
+import json
+import sys
+from modules import league
+from . import suite
+
+def main():
+	parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+		formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("-p", "--pop-size", type=int, default=league.POP_SIZE,
+		help="Population size used while benchmarking")
+	parser.add_argument("-n", "--net-struct", type=str,
+		default=",".join(str(nodes) for nodes in league.NET_STRUCT),
+		help="Comma separated nodes of the input and each layer")
+	parser.add_argument("-s", "--seed", type=int, default=0)
+	parser.add_argument("-r", "--repeat", type=int, default=3,
+		help="Times each benchmark is run, the best result is kept")
+	parser.add_argument("-b", "--benchmark", action="append",
+		choices=[benchmark.name for benchmark in suite.BENCHMARKS],
+		help="Only run this benchmark, can be given more than once")
+	parser.add_argument("-o", "--output", type=str,
+		help="Writes the results as json to a file")
+	parser.add_argument("--baseline", type=str,
+		help="Compares the results to a json file written with --output")
+	parser.add_argument("--threshold", type=float, default=0.1,
+		help="Fraction a benchmark may get worse by before it is flagged")
+	args = parser.parse_args()
+
+	net_struct = tuple(int(nodes) for nodes in args.net_struct.split(","))
+	results = suite.run(args.pop_size, net_struct, args.seed, args.repeat, args.benchmark)
+
+	for name, metric in results["metrics"].items():
+		print("{:<20} {:>14.6g} {}".format(name, metric["value"], metric["unit"]))
+
+	if args.output != None:
+		with open(args.output, "w") as f:
+			json.dump(results, f, indent=1)
+
+	if args.baseline != None:
+		with open(args.baseline, "r") as f:
+			baseline = json.load(f)
+		for key in ("pop_size", "net_struct", "seed"):
+			if baseline["config"].get(key) != results["config"][key]:
+				print("WARNING baseline {} is {}, these results used {}".format(\
+					key, baseline["config"].get(key), results["config"][key]))
+		regressions = suite.compare(results, baseline, args.threshold)
+		for regression in regressions:
+			print("REGRESSION", regression)
+		if regressions:
+			sys.exit(1)
+
+if __name__ == '__main__':
+	main()
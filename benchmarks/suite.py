@@ -0,0 +1,248 @@
+"""
+The benchmarks and the functions that run and compare them
+
+Every benchmark is timed at a given population size and network
+structure with fixed seeds, and reports one number. Results are plain
+dictionaries that can be saved as json and compared to a baseline
+
+Constants
+---------
+BENCHMARKS: list of Benchmark
+	every benchmark in the order they are run
+
+Functions
+---------
+run(pop_size, net_struct, seed=0, repeat=3, names=None): dict
+	runs benchmarks and returns their results
+
+compare(results, baseline, threshold=0.1): list of str
+	returns the benchmarks that regressed from baseline
+"""
+
+from collections import namedtuple
+import platform
+import random
+import time
+import numpy as np
+from modules import league
+from modules.game import Game, LegacyGame
+from modules.simple_gen_neural_net import GenomeArena, SimpleGenNeuralNet
+
+Benchmark = namedtuple("Benchmark", ["name", "unit", "higher_is_better", "function"])
+
+#games and positions are replayed from fixed random move sequences
+_GAMES = 200
+#generations bred by arena_breed
+_BREEDS = 20
+
+def _move_sequences(seed):
+	rng = random.Random(seed)
+	sequences = []
+	for i in range(_GAMES):
+		game = Game()
+		moves = []
+		while True:
+			move = rng.randrange(7)
+			if not game.can_place(move):
+				break
+			moves.append(move)
+			if game.check_win_with(move):
+				break
+		sequences.append(moves)
+	return sequences
+
+def _engine_moves(engine, sequences):
+	moves = 0
+	start = time.perf_counter()
+	for sequence in sequences:
+		game = engine()
+		for move in sequence:
+			game.check_win_with(move)
+		moves += len(sequence)
+	return moves / (time.perf_counter() - start)
+
+def game_moves(config):
+	return _engine_moves(Game, config["sequences"])
+
+def legacy_game_moves(config):
+	return _engine_moves(LegacyGame, config["sequences"])
+
+def _positions(config):
+	return [np.array(game.board).flatten() for game in config["positions"]]
+
+def feed_forward(config):
+	agent = config["league"].population[0]
+	positions = _positions(config)
+	start = time.perf_counter()
+	for position in positions:
+		agent.feed_forward(position)
+	return len(positions) / (time.perf_counter() - start)
+
+def choose_move(config):
+	agent = config["league"].population[0]
+	positions = config["positions"]
+	start = time.perf_counter()
+	for game in positions:
+		league.choose_move(agent, game.inputs, game.current_player)
+	return len(positions) / (time.perf_counter() - start)
+
+def crossover_mutate(config):
+	parents = config["league"].population
+	children = max(len(parents), 50)
+	start = time.perf_counter()
+	for i in range(children):
+		SimpleGenNeuralNet.crossover(parents[i % len(parents)],\
+			parents[(i + 1) % len(parents)]).mutate(league.MUTATED_NODES)
+	return children / (time.perf_counter() - start)
+
+def arena_breed(config):
+	size = len(config["league"].population)
+	arena = GenomeArena(*config["net_struct"], size=2*size)
+	arena.randomize(range(size))
+	parents = np.arange(size)
+	start = time.perf_counter()
+	for i in range(_BREEDS):
+		arena.breed(parents, np.roll(parents, 1), parents + size, league.MUTATED_NODES)
+	return _BREEDS * size / (time.perf_counter() - start)
+
+def _season(season_league, batched):
+	season_league.standings[:] = 0
+	start = time.perf_counter()
+	season_league.play_season(batched)
+	elapsed = time.perf_counter() - start
+	return season_league.standings[:, 0].sum() / elapsed
+
+def play_season(config):
+	return _season(config["league"], False)
+
+def play_season_batched(config):
+	return _season(config["league"], True)
+
+def generation(config):
+	current = config["league"]
+	state = (list(current.population), current.standings.copy(), current.results.copy())
+	genomes = current.arena.genomes.copy()
+	start = time.perf_counter()
+	current.repop_from(current.gather_top())
+	current.play_season(True)
+	elapsed = time.perf_counter() - start
+	#the next repeat breeds from the same population
+	current.population, current.standings, current.results = state
+	current.ratings = None
+	current.arena.genomes[:] = genomes
+	return elapsed
+
+BENCHMARKS = [
+	Benchmark("game_moves", "moves/s", True, game_moves),
+	Benchmark("legacy_game_moves", "moves/s", True, legacy_game_moves),
+	Benchmark("feed_forward", "calls/s", True, feed_forward),
+	Benchmark("choose_move", "calls/s", True, choose_move),
+	Benchmark("crossover_mutate", "children/s", True, crossover_mutate),
+	Benchmark("arena_breed", "children/s", True, arena_breed),
+	Benchmark("play_season", "games/s", True, play_season),
+	Benchmark("play_season_batched", "games/s", True, play_season_batched),
+	Benchmark("generation", "s/generation", False, generation),
+]
+
+def _setup(pop_size, net_struct, seed):
+	random.seed(seed)
+	np.random.seed(seed)
+	league.POP_SIZE = pop_size
+	league.NET_STRUCT = tuple(net_struct)
+	current = league.League()
+	current.generate_pop()
+	sequences = _move_sequences(seed)
+	positions = []
+	for sequence in sequences:
+		game = Game()
+		for move in sequence[:-1]:
+			game.check_win_with(move)
+		positions.append(game)
+	return {"net_struct": tuple(net_struct), "sequences": sequences, "positions": positions,\
+		"league": current}
+
+def run(pop_size, net_struct, seed=0, repeat=3, names=None):
+	"""
+	runs benchmarks and returns their results
+
+	each benchmark is run repeat times and its best result is kept
+
+	Parameters
+	----------
+	pop_size: int
+		league.POP_SIZE used while benchmarking
+
+	net_struct: tuple of int
+		league.NET_STRUCT used while benchmarking
+
+	seed: int, optional
+		seed of every random number used(defaults to 0)
+
+	repeat: int, optional
+		times each benchmark is run(defaults to 3)
+
+	names: list of str, optional
+		benchmarks to run(defaults to all of BENCHMARKS)
+
+	Returns
+	-------
+	dict
+		"config" with the parameters and "metrics" with the value,
+		unit and direction of each benchmark
+	"""
+	config = _setup(pop_size, net_struct, seed)
+	metrics = {}
+	for benchmark in BENCHMARKS:
+		if names is not None and benchmark.name not in names:
+			continue
+		values = [benchmark.function(config) for i in range(repeat)]
+		metrics[benchmark.name] = {
+			"value": max(values) if benchmark.higher_is_better else min(values),
+			"unit": benchmark.unit,
+			"higher_is_better": benchmark.higher_is_better
+		}
+
+	return {
+		"config": {
+			"pop_size": pop_size,
+			"net_struct": list(net_struct),
+			"seed": seed,
+			"repeat": repeat,
+			"python": platform.python_version(),
+			"numpy": np.__version__
+		},
+		"metrics": metrics
+	}
+
+def compare(results, baseline, threshold=0.1):
+	"""
+	returns the benchmarks that regressed from baseline
+
+	Parameters
+	----------
+	results, baseline: dict
+		results returned by run
+
+	threshold: float, optional
+		fraction a benchmark may get worse by before it counts as a
+		regression(defaults to 0.1)
+
+	Returns
+	-------
+	list of str
+		a description of each regression
+	"""
+	regressions = []
+	for name, metric in results["metrics"].items():
+		if name not in baseline["metrics"]:
+			continue
+		before = baseline["metrics"][name]["value"]
+		after = metric["value"]
+		if metric["higher_is_better"]:
+			change = (before - after) / before
+		else:
+			change = (after - before) / before
+		if change > threshold:
+			regressions.append("{}: {:.4g} -> {:.4g} {} ({:.1%} worse)".format(\
+				name, before, after, metric["unit"], change))
+	return regressions
@@ -0,0 +1,242 @@
+"""
+Bounded caches of results that are fully determined by the agents
+
+Classes
+-------
+MatchCache
+	results of games between agents keyed by the agents' content hashes
+
+MoveMemo
+	moves chosen by agents keyed by agent and position
+"""
+
+from collections import OrderedDict
+
+class MatchCache(object):
+	"""
+	Results of games between agents keyed by the agents' content hashes
+
+	Games between two agents always end the same way because choose_move
+	is an argmax and the game has no randomness, so a result can be 
+	reused for as long as neither agent's weights change. The least
+	recently used results are evicted once the cache is full
+
+	Attributes
+	----------
+	maxsize: int
+		most results kept
+
+	hits, misses: int
+		number of lookups that found or did not find a result
+
+	Methods
+	-------
+	get(first, second): int or None
+		returns the cached winner of a game
+
+	put(first, second, winner)
+		stores the winner of a game
+
+	reset_counts()
+		Sets hits and misses back to 0
+	"""
+	def __init__(self, maxsize=65536):
+		"""
+		Parameters
+		----------
+		maxsize: int, optional
+			most results kept(defaults to 65536)
+		"""
+		super(MatchCache, self).__init__()
+		if maxsize < 1:
+			raise Exception("a match cache must hold at least one result, maxsize {} was given".format(maxsize))
+		self.maxsize = maxsize
+		self.hits = 0
+		self.misses = 0
+		self._results = OrderedDict()
+
+	def __len__(self):
+		return len(self._results)
+
+	def get(self, first, second):
+		"""
+		returns the cached winner of a game
+
+		Parameters
+		----------
+		first, second: bytes
+			content hashes of the agent that went first and second
+
+		Returns
+		-------
+		int or None
+			1 if the first agent won, -1 for the second and None if the
+			game is not cached
+		"""
+		key = (first, second)
+		winner = self._results.get(key)
+		if winner is None:
+			self.misses += 1
+		else:
+			self.hits += 1
+			self._results.move_to_end(key)
+		return winner
+
+	def put(self, first, second, winner):
+		"""
+		stores the winner of a game
+
+		Parameters
+		----------
+		first, second: bytes
+			content hashes of the agent that went first and second
+
+		winner: int
+			1 if the first agent won, -1 for the second
+		"""
+		key = (first, second)
+		self._results[key] = int(winner)
+		self._results.move_to_end(key)
+		if len(self._results) > self.maxsize:
+			self._results.popitem(last=False)
+
+	def reset_counts(self):
+		"""
+		Sets hits and misses back to 0
+		"""
+		self.hits = 0
+		self.misses = 0
+
+class MoveMemo(object):
+	"""
+	Moves chosen by agents keyed by agent and position
+
+	An agent always chooses the same move in the same position, and the
+	first few plies of league games repeat across many opponents, so a
+	move can be remembered instead of running the network again. One
+	least recently used order is kept across every agent so the whole
+	memo never holds more than maxsize moves. An agent's moves are 
+	dropped the next time it is looked up after its weights changed
+
+	Attributes
+	----------
+	maxsize: int
+		most moves kept across all agents
+
+	hits, misses: int
+		number of lookups that found or did not find a move
+
+	Methods
+	-------
+	get(agent, key): int or None
+		returns the move an agent chose in a position
+
+	put(agent, key, move)
+		remembers the move an agent chose in a position
+
+	hit_rate(): float
+		fraction of lookups that found a move
+
+	reset_counts()
+		Sets hits and misses back to 0
+	"""
+	def __init__(self, maxsize=262144):
+		"""
+		Parameters
+		----------
+		maxsize: int, optional
+			most moves kept across all agents(defaults to 262144)
+		"""
+		super(MoveMemo, self).__init__()
+		if maxsize < 1:
+			raise Exception("a move memo must hold at least one move, maxsize {} was given".format(maxsize))
+		self.maxsize = maxsize
+		self.hits = 0
+		self.misses = 0
+		self._moves = OrderedDict()
+		#positions remembered and weights version by uid, only of agents
+		#with moves held so neither grows past maxsize entries
+		self._positions = {}
+		self._versions = {}
+
+	def __len__(self):
+		return len(self._moves)
+
+	def _forget(self, uid):
+		for key in self._positions.pop(uid, ()):
+			del self._moves[(uid, key)]
+		self._versions.pop(uid, None)
+
+	def get(self, agent, key):
+		"""
+		returns the move an agent chose in a position
+
+		Parameters
+		----------
+		agent: SimpleGenNeuralNet
+
+		key: hashable
+			the position, such as Game.key()
+
+		Returns
+		-------
+		int or None
+			the move, None if it is not remembered
+		"""
+		if self._versions.get(agent.uid) != agent.version:
+			self._forget(agent.uid)
+			self.misses += 1
+			return None
+
+		move = self._moves.get((agent.uid, key))
+		if move is None:
+			self.misses += 1
+		else:
+			self.hits += 1
+			self._moves.move_to_end((agent.uid, key))
+		return move
+
+	def put(self, agent, key, move):
+		"""
+		remembers the move an agent chose in a position
+
+		Parameters
+		----------
+		agent: SimpleGenNeuralNet
+
+		key: hashable
+			the position, such as Game.key()
+
+		move: int
+		"""
+		if self._versions.get(agent.uid) != agent.version:
+			self._forget(agent.uid)
+			self._versions[agent.uid] = agent.version
+
+		self._moves[(agent.uid, key)] = move
+		self._positions.setdefault(agent.uid, set()).add(key)
+		if len(self._moves) > self.maxsize:
+			(uid, oldest), move = self._moves.popitem(last=False)
+			positions = self._positions[uid]
+			positions.discard(oldest)
+			if not positions:
+				del self._positions[uid]
+				del self._versions[uid]
+
+	def hit_rate(self):
+		"""
+		fraction of lookups that found a move
+
+		Returns
+		-------
+		float
+		"""
+		lookups = self.hits + self.misses
+		return self.hits / lookups if lookups else 0.0
+
+	def reset_counts(self):
+		"""
+		Sets hits and misses back to 0
+		"""
+		self.hits = 0
+		self.misses = 0
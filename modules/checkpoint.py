@@ -0,0 +1,437 @@
+"""
+Binary population files
+
+A population file starts with a small header followed by the genomes
+of every agent as one contiguous block of little endian float64, laid
+out the same way as the rows of a GenomeArena. Files can be memory
+mapped and used as an arena's storage without parsing the weights
+
+Layout
+------
+MAGIC: 8 bytes
+	identifies the file and its version
+
+header length: 4 bytes
+	little endian unsigned int
+
+header: json
+	net_struct, pop_size, generation, standings and ranking plus any
+	other metadata given when the file was written, padded with spaces
+	so the genomes start at a multiple of ALIGNMENT bytes
+
+genomes: pop_size * genome length float64
+
+Constants
+---------
+EXTENSION: str
+	file extension of population files
+
+Classes
+-------
+SnapshotWriter
+	writes population files on a background thread
+
+Functions
+---------
+is_checkpoint(filename): boolean
+	returns whether a filename names a binary population file
+
+write(filename, networks, standings=None, generation=0, **metadata)
+	writes networks to a population file
+
+create(filename, num_nodes, pop_size, **metadata): dict
+	creates a population file with room for pop_size genomes
+
+update_header(filename, standings=None, generation=0, **metadata)
+	rewrites the header of a population file, keeping its genomes
+
+rng_state(): dict
+	returns the state of the random and numpy.random generators
+
+set_rng_state(state)
+	restores the random and numpy.random generators
+
+read_header(filename): dict
+	reads only the header of a population file
+
+read(filename, mmap=True): dict, GenomeArena
+	reads the header and genomes of a population file
+
+read_network(filename, index, header=None): SimpleGenNeuralNet
+	reads the genome of one agent from a population file
+
+convert(json_filename, filename)
+	converts a json population from train.py to a population file
+
+This module can run as a script to convert json populations
+"""
+
+import argparse
+import json
+import os
+import random
+import struct
+import threading
+import numpy as np
+from .simple_gen_neural_net import GenomeArena, SimpleGenNeuralNet
+
+EXTENSION = ".c4p"
+MAGIC = b"C4POP\x00\x00\x01"
+ALIGNMENT = 64
+_LENGTH = struct.Struct("<I")
+_DTYPE = np.dtype("<f8")
+#bytes copied at a time when a header is rewritten
+_CHUNK = 1 << 24
+
+def is_checkpoint(filename):
+	"""
+	returns whether a filename names a binary population file
+
+	Parameters
+	----------
+	filename: str
+
+	Returns
+	-------
+	boolean
+	"""
+	return filename.lower().endswith(EXTENSION)
+
+def write(filename, networks, standings=None, generation=0, **metadata):
+	"""
+	writes networks to a population file
+
+	the file is written beside filename and renamed over it once it is
+	complete, so a crash never leaves a partly written file
+
+	Parameters
+	----------
+	filename: str
+
+	networks: list of SimpleGenNeuralNet
+		population to write, all with the same structure
+
+	standings: list of lists with 2 ints, optional
+		wins and losses of each network
+
+	generation: int, optional
+		number of generations the population has been trained for
+		(defaults to 0)
+
+	metadata - keyword: 
+		any other json serializable values to keep in the header
+	"""
+	_write(filename, networks[0].structure(), _genomes(networks),\
+		standings, generation, metadata)
+
+def create(filename, num_nodes, pop_size, **metadata):
+	"""
+	creates a population file with room for pop_size genomes
+
+	the genomes are left unwritten, to be filled through a writable
+	memory map of the file
+
+	Parameters
+	----------
+	filename: str
+
+	num_nodes: tuple of int
+		number of nodes at input and then every layer afterwards
+
+	pop_size: int
+		number of genomes the file holds
+
+	metadata - keyword: 
+		any other json serializable values to keep in the header
+
+	Returns
+	-------
+	dict
+		the header, as returned by read_header
+	"""
+	header = _header(num_nodes, pop_size, None, 0, metadata)
+	length = sum((inputs + 1) * size for inputs, size in zip(num_nodes, num_nodes[1:]))
+	with open(filename, "wb") as f:
+		f.write(header)
+		f.truncate(len(header) + pop_size * length * _DTYPE.itemsize)
+	return read_header(filename)
+
+def update_header(filename, standings=None, generation=0, **metadata):
+	"""
+	rewrites the header of a population file, keeping its genomes
+
+	the genomes are copied a chunk at a time to a file written beside
+	filename and renamed over it, so files larger than memory can be
+	updated
+
+	Parameters
+	----------
+	filename: str
+
+	standings: list of lists with 2 ints, optional
+		wins and losses of each genome
+
+	generation: int, optional
+		number of generations the population has been trained for
+		(defaults to 0)
+
+	metadata - keyword: 
+		any other json serializable values to keep in the header
+	"""
+	old = read_header(filename)
+	header = _header(old["net_struct"], old["pop_size"], standings, generation, metadata)
+	temporary = filename + ".tmp"
+	with open(filename, "rb") as source, open(temporary, "wb") as f:
+		f.write(header)
+		source.seek(old["offset"])
+		while True:
+			chunk = source.read(_CHUNK)
+			if not chunk:
+				break
+			f.write(chunk)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(temporary, filename)
+
+def _genomes(networks):
+	return np.stack([np.concatenate([layer.ravel() for layer in network.layer_weights])\
+		for network in networks]).astype(_DTYPE, copy=False)
+
+def _header(num_nodes, pop_size, standings, generation, metadata):
+	#the magic, length and padded json header that start a file
+	header = dict(metadata)
+	header["net_struct"] = list(num_nodes)
+	header["pop_size"] = pop_size
+	header["generation"] = generation
+	header["standings"] = standings
+	encoded = json.dumps(header).encode("utf-8")
+	start = len(MAGIC) + _LENGTH.size + len(encoded)
+	encoded += b" " * (-start % ALIGNMENT)
+	return MAGIC + _LENGTH.pack(len(encoded)) + encoded
+
+def _write(filename, num_nodes, genomes, standings, generation, metadata):
+	header = _header(num_nodes, len(genomes), standings, generation, metadata)
+
+	#written beside the file and renamed over it, so a file that is 
+	#memory mapped as the population being written is never truncated
+	temporary = filename + ".tmp"
+	with open(temporary, "wb") as f:
+		f.write(header)
+		genomes.tofile(f)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(temporary, filename)
+
+class SnapshotWriter(object):
+	"""
+	Writes population files on a background thread
+
+	The population is copied when write is called and written to disk
+	while training continues, only one snapshot is written at a time
+
+	Methods
+	-------
+	write(filename, networks, standings=None, generation=0, **metadata)
+		copies the population and starts writing it
+
+	wait()
+		blocks until the snapshot being written is on disk
+	"""
+	def __init__(self):
+		super(SnapshotWriter, self).__init__()
+		self._thread = None
+		self._error = None
+
+	def write(self, filename, networks, standings=None, generation=0, **metadata):
+		"""
+		copies the population and starts writing it
+
+		waits for the previous snapshot first, takes the same 
+		parameters as checkpoint.write
+
+		Raises
+		------
+		Exception
+			If writing the previous snapshot failed
+		"""
+		self.wait()
+		genomes = _genomes(networks)
+		if standings is not None:
+			standings = [list(record) for record in standings]
+
+		self._thread = threading.Thread(target=self._run, args=(filename,\
+			networks[0].structure(), genomes, standings, generation, metadata))
+		self._thread.start()
+
+	def _run(self, *args):
+		try:
+			_write(*args)
+		except Exception as error:
+			self._error = error
+
+	def wait(self):
+		"""
+		blocks until the snapshot being written is on disk
+
+		Raises
+		------
+		Exception
+			If writing the snapshot failed
+		"""
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
+		if self._error is not None:
+			error, self._error = self._error, None
+			raise error
+
+def rng_state():
+	"""
+	returns the state of the random and numpy.random generators
+
+	Returns
+	-------
+	dict
+		json serializable state for set_rng_state
+	"""
+	version, internal, gauss = random.getstate()
+	name, keys, position, has_gauss, cached_gaussian = np.random.get_state()
+	return {
+		"random": [version, list(internal), gauss],
+		"numpy": [name, keys.tolist(), position, has_gauss, cached_gaussian]
+	}
+
+def set_rng_state(state):
+	"""
+	restores the random and numpy.random generators
+
+	Parameters
+	----------
+	state: dict
+		state returned by rng_state
+	"""
+	version, internal, gauss = state["random"]
+	random.setstate((version, tuple(internal), gauss))
+	name, keys, position, has_gauss, cached_gaussian = state["numpy"]
+	np.random.set_state((name, np.array(keys, dtype=np.uint32), position,\
+		has_gauss, cached_gaussian))
+
+def read_header(filename):
+	"""
+	reads only the header of a population file
+
+	Parameters
+	----------
+	filename: str
+
+	Returns
+	-------
+	dict
+		the header, with the byte offset of the genomes as "offset"
+
+	Raises
+	------
+	Exception
+		If the file is not a population file
+	"""
+	with open(filename, "rb") as f:
+		if f.read(len(MAGIC)) != MAGIC:
+			raise Exception("{} is not a population file of this version".format(filename))
+		length, = _LENGTH.unpack(f.read(_LENGTH.size))
+		header = json.loads(f.read(length).decode("utf-8"))
+
+	header["offset"] = len(MAGIC) + _LENGTH.size + length
+	return header
+
+def read(filename, mmap=True):
+	"""
+	reads the header and genomes of a population file
+
+	Parameters
+	----------
+	filename: str
+
+	mmap: boolean, optional
+		map the genomes copy on write instead of reading them, changes
+		made to the arena are never written back(defaults to True)
+
+	Returns
+	-------
+	dict
+		the header
+
+	GenomeArena
+		arena of pop_size networks, in the order they were written
+	"""
+	header = read_header(filename)
+	num_nodes = header["net_struct"]
+	length = sum((inputs + 1) * size for inputs, size in zip(num_nodes, num_nodes[1:]))
+	shape = (header["pop_size"], length)
+	if mmap:
+		genomes = np.memmap(filename, dtype=_DTYPE, mode="c", offset=header["offset"], shape=shape)
+	else:
+		genomes = np.fromfile(filename, dtype=_DTYPE, count=shape[0]*shape[1],\
+			offset=header["offset"]).reshape(shape)
+
+	return header, GenomeArena(*num_nodes, genomes=genomes)
+
+def read_network(filename, index, header=None):
+	"""
+	reads the genome of one agent from a population file
+
+	only that agent's weights are read from the file
+
+	Parameters
+	----------
+	filename: str
+
+	index: int
+		position of the agent in the file
+
+	header: dict, optional
+		the file's header from read_header, read again if not given
+
+	Returns
+	-------
+	SimpleGenNeuralNet
+	"""
+	if header is None:
+		header = read_header(filename)
+	num_nodes = header["net_struct"]
+	length = sum((inputs + 1) * size for inputs, size in zip(num_nodes, num_nodes[1:]))
+	genome = np.fromfile(filename, dtype=_DTYPE, count=length,\
+		offset=header["offset"] + index * length * _DTYPE.itemsize)
+	return GenomeArena(*num_nodes, genomes=genome.reshape(1, length)).networks[0]
+
+def convert(json_filename, filename):
+	"""
+	converts a json population from train.py to a population file
+
+	Parameters
+	----------
+	json_filename: str
+		file written by League.export
+
+	filename: str
+		population file to write
+	"""
+	with open(json_filename, "r") as f:
+		data = json.load(f)
+
+	if isinstance(data, dict):
+		write(filename, [SimpleGenNeuralNet.from_export(agent) for agent in data["agents"]],\
+			data["standings"], ranking=data["ranking"])
+	else:
+		write(filename, [SimpleGenNeuralNet.from_export(agent) for agent in data])
+
+def main():
+	parser = argparse.ArgumentParser(description="Converts a json population to a binary population file")
+	parser.add_argument("json_file", type=str,
+		help="json population written by train.py")
+	parser.add_argument("output", type=str,
+		help="population file to write, should end with " + EXTENSION)
+	args = parser.parse_args()
+	convert(args.json_file, args.output)
+
+if __name__ == '__main__':
+	main()
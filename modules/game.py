@@ -1,7 +1,173 @@
+"""
+Connect four game engines
+
+Classes
+-------
+Game
+	bitboard engine, used for league play by default
+
+LegacyGame
+	original list based engine with the same interface as Game
+
+BatchGame
+	many games stored in one numpy array and played in lockstep
+
+Constants
+---------
+ROWS, COLUMNS: int
+	dimensions of the board
+
+WINNING_LINES: narray
+	(69, 4) flat board indices of every line of four slots
+
+ENGINES: dict of str to class
+	the available game engines by name
+"""
+
+import numpy as np
+
+ROWS = 6
+COLUMNS = 7
+
+def _winning_lines():
+	lines = []
+	for row in range(ROWS):
+		for col in range(COLUMNS):
+			for drow, dcol in ((0, 1), (1, 0), (1, 1), (1, -1)):
+				end_row, end_col = row + 3*drow, col + 3*dcol
+				if 0 <= end_row < ROWS and 0 <= end_col < COLUMNS:
+					lines.append([(row + i*drow)*COLUMNS + col + i*dcol for i in range(4)])
+	return np.array(lines, dtype=np.intp)
+
+WINNING_LINES = _winning_lines()
+
 class Game(object):
 	"""
 	A class to keep track of a game of Connect-4 and determine a winner
 
+	Each player's pieces are kept in a bitboard so placing a piece and
+	checking for a win are done with a few integer operations. Every 
+	column takes ROWS + 1 bits, the bottom slot of column c is bit 
+	c*(ROWS+1) and the extra bit on top of each column stays empty so 
+	shifts never wrap a line of pieces from one column into the next
+
+	Class Constant
+	--------------
+	SHIFTS: list of int
+		bit distance between neighbouring slots along each search axis
+		vertical, horizontal and both diagonals
+
+	Attributes
+	----------
+	board: nested list of int
+		represents the connect four board 0 represents no piece 
+		player one's pieces are represented by 1 and player two's by -1
+
+	inputs: narray
+		(ROWS, COLUMNS) int8 copy of board kept in step with it, so
+		agents can be given the position without converting board
+
+	current_player: int
+		represents the player who will take the next turn. 1 for
+		player one and -1 for player 2
+
+	Methods
+	-------
+	can_place(move): boolean
+		returns whether a piece can be placed in the given column
+
+	check_win_with(move): boolean
+		places the current player's piece with the given move and
+		returns if that player won the game.
+
+	key(): hashable
+		compact encoding of the position
+	"""
+	SHIFTS = [1, ROWS + 1, ROWS, ROWS + 2] #search axis
+	_BITS = [1 << bit for bit in range(COLUMNS * (ROWS + 1))]
+	_TOPS = [column * (ROWS + 1) + ROWS for column in range(COLUMNS)]
+
+	def __init__(self):
+		super(Game, self).__init__()
+		self.board = [[0] * COLUMNS for row in range(ROWS)]
+		self.inputs = np.zeros((ROWS, COLUMNS), dtype=np.int8)
+		self.current_player = 1
+		#bitboards of each player's pieces
+		self._pieces = {1: 0, -1: 0}
+		#next free bit in each column
+		self._heights = [column * (ROWS + 1) for column in range(COLUMNS)]
+
+	def can_place(self, move):
+		"""
+		returns whether a piece can be placed in the given column
+
+		Parameters
+		----------
+		move: int 
+			where the piece would be placed 
+			0 being the left most column of the board
+
+		Returns
+		-------
+		boolean
+			whether a piece can be place in the given column
+		"""
+		return self._heights[move] < Game._TOPS[move]
+
+	def key(self):
+		"""
+		compact encoding of the position
+
+		Returns
+		-------
+		tuple of int
+			the bitboards of player one's and player two's pieces
+		"""
+		return (self._pieces[1], self._pieces[-1])
+
+	def check_win_with(self, move): 
+		"""
+		places the current player's piece with the given move and
+		returns if that player won the game. 
+
+		If false is returned the current player is swapped
+
+		Parameters
+		----------
+		move: int
+			where the piece is dropped
+			0 being the left most column of the board
+
+		Returns
+		-------
+		boolean
+			whether the move given won the game for the current player
+		"""
+		bit = self._heights[move]
+		self._heights[move] = bit + 1
+		self.board[Game._TOPS[move] - 1 - bit][move] = self.current_player
+		self.inputs[Game._TOPS[move] - 1 - bit, move] = self.current_player
+		pieces = self._pieces[self.current_player] | Game._BITS[bit]
+		self._pieces[self.current_player] = pieces
+
+		for shift in Game.SHIFTS:
+			#pairs of pieces that have a neighbour along the axis,
+			#then pairs of those pairs two slots apart make four in a row
+			pairs = pieces & (pieces >> shift)
+			if pairs & (pairs >> 2 * shift):
+				return True
+
+		self.current_player *= -1
+		return False
+
+
+class LegacyGame(object):
+	"""
+	A class to keep track of a game of Connect-4 and determine a winner
+
+	The original list based engine, kept so results from the bitboard
+	engine in Game can be checked against it
+
 	Class Constant
 	--------------
 	SEARCH_PAIRS: nested list of int
@@ -13,6 +179,10 @@ class Game(object):
 		represents the connect four board 0 represents no piece 
 		player one's pieces are represented by 1 and player two's by -1
 
+	inputs: narray
+		(ROWS, COLUMNS) int8 copy of board kept in step with it, so
+		agents can be given the position without converting board
+
 	current_player: int
 		represents the player who will take the next turn. 1 for
 		player one and -1 for player 2
@@ -25,11 +195,14 @@ class Game(object):
 	check_win_with(move): boolean
 		places the current player's piece with the given move and
 		returns if that player won the game.
+
+	key(): hashable
+		compact encoding of the position
 	"""
 	SEARCH_PAIRS = [[-1,0],[-1,1],[0,1],[1,1]] #search axis
 
 	def __init__(self):
-		super(Game, self).__init__()
+		super(LegacyGame, self).__init__()
 		self.board = [
 			[0,0,0,0,0,0,0],
 			[0,0,0,0,0,0,0],
@@ -38,6 +211,7 @@ class Game(object):
 			[0,0,0,0,0,0,0],
 			[0,0,0,0,0,0,0]
 			]
+		self.inputs = np.zeros((ROWS, COLUMNS), dtype=np.int8)
 		self.current_player = 1
 
 	def can_place(self, move):
@@ -57,6 +231,17 @@ class Game(object):
 		"""
 		return self.board[0][move] == 0
 
+	def key(self):
+		"""
+		compact encoding of the position
+
+		Returns
+		-------
+		bytes
+			one byte for each slot of the board
+		"""
+		return bytes(slot % 3 for row in self.board for slot in row)
+
 	def check_win_with(self, move): 
 		"""
 		places the current player's piece with the given move and
@@ -77,8 +262,9 @@ class Game(object):
 		"""
 		row, col = self._piece_fall(0,move)
 		self.board[row][col] = self.current_player
+		self.inputs[row, col] = self.current_player
 		
-		for pair in Game.SEARCH_PAIRS:
+		for pair in LegacyGame.SEARCH_PAIRS:
 			#recursively count pieces in a row in opposite directions
 			#starting on the last played piece
 			in_a_row = self._count_in_direction(0, pair[0], pair[1], self.current_player, row, col)\
@@ -104,4 +290,108 @@ class Game(object):
 			return count
 		if self.board[row][col] == player:
 			return self._count_in_direction(count+1, drow, dcol, player, row+drow, col+dcol)
-		return count		
\ No newline at end of file
+		return count
+
+
+class BatchGame(object):
+	"""
+	Plays many games of Connect-4 in lockstep
+
+	Every game is stepped by one ply on each call to play, games that
+	have finished ignore the moves given to them. Game rules match 
+	league.play_game, a player whose move is into a full column
+	forfeits the game
+
+	Attributes
+	----------
+	boards: narray
+		(G, ROWS, COLUMNS) int8 boards using the same representation
+		as Game.board
+
+	current_player: narray
+		(G,) int8 player who will take the next turn in each game
+
+	done: narray
+		(G,) bool whether each game has finished
+
+	winner: narray
+		(G,) int8 1 if player one won, -1 if player two won and
+		0 for games still being played
+
+	Methods
+	-------
+	live(): narray
+		indices of the games still being played
+
+	play(moves): narray
+		plays one move in every unfinished game and returns the indices
+		of the games that finished with it
+	"""
+	def __init__(self, size):
+		"""
+		Parameters
+		----------
+		size: int
+			number of games played
+		"""
+		super(BatchGame, self).__init__()
+		self.boards = np.zeros((size, ROWS, COLUMNS), dtype=np.int8)
+		self.current_player = np.ones(size, dtype=np.int8)
+		self.done = np.zeros(size, dtype=bool)
+		self.winner = np.zeros(size, dtype=np.int8)
+		#pieces in each column
+		self._heights = np.zeros((size, COLUMNS), dtype=np.int8)
+
+	def live(self):
+		"""
+		indices of the games still being played
+
+		Returns
+		-------
+		narray
+		"""
+		return np.flatnonzero(~self.done)
+
+	def play(self, moves):
+		"""
+		plays one move in every unfinished game and returns the indices
+		of the games that finished with it
+
+		Parameters
+		----------
+		moves: narray
+			(G,) column played in each game, entries for games that
+			are already done are ignored
+
+		Returns
+		-------
+		narray
+			indices of the games that were won or forfeit by this move
+		"""
+		live = self.live()
+		columns = np.asarray(moves)[live]
+		heights = self._heights[live, columns]
+
+		illegal = heights >= ROWS
+		forfeit = live[illegal]
+		self.winner[forfeit] = -self.current_player[forfeit]
+		self.done[forfeit] = True
+
+		legal = ~illegal
+		live, columns, heights = live[legal], columns[legal], heights[legal]
+		players = self.current_player[live]
+		self.boards[live, ROWS - 1 - heights, columns] = players
+		self._heights[live, columns] += 1
+
+		flat = self.boards[live].reshape(len(live), ROWS*COLUMNS)
+		line_sums = flat[:, WINNING_LINES].sum(axis=2, dtype=np.int8)
+		won_mask = (line_sums == 4*players[:, None]).any(axis=1)
+		won = live[won_mask]
+		self.winner[won] = players[won_mask]
+		self.done[won] = True
+		self.current_player[live[~won_mask]] *= -1
+
+		return np.concatenate((forfeit, won))
+
+
+ENGINES = {"bitboard": Game, "legacy": LegacyGame}
@@ -0,0 +1,272 @@
+"""
+Compact binary log of league games
+
+A log is MAGIC followed by chunks, one for each batch of games written.
+A chunk starts with the generation, the number of games and the bytes
+of games in it, little endian, so a reader can skip whole chunks
+without reading their games. Each game is
+
+first: uint64
+	agent_id of the agent that went first, the same for an agent in
+	every generation it survives and across resumed runs
+
+second: uint64
+	agent_id of the agent that went second
+
+result: int8
+	1 if the first agent won, -1 if the second did
+
+cached: uint8
+	1 if the result was taken from a MatchCache rather than played,
+	such games have no moves, those of the earlier game that was
+	played are logged with it
+
+plies: uint8
+	number of moves
+
+moves: plies bytes
+	column of each move, the last move of a forfeit game is the move
+	into a full column
+
+Constants
+---------
+MAX_PLIES: int
+	most moves in a game, every square filled and then a forfeit
+
+NO_MOVE: int
+	marks plies after the end of a game in a history array
+
+Classes
+-------
+GameLog
+	appends games to a log on a background thread
+
+Functions
+---------
+agent_id(content_hash): int
+	id an agent is logged under
+
+read(filename, generation=0, offset=None): iterator of tuples
+	reads the games of a log lazily
+"""
+
+import os
+import queue
+import struct
+import threading
+import numpy as np
+from .game import COLUMNS, ROWS
+
+MAX_PLIES = ROWS*COLUMNS + 1
+NO_MOVE = 255
+MAGIC = b"C4GAMES\x02"
+_CHUNK = struct.Struct("<III")
+_GAME = np.dtype([("first", "<u8"), ("second", "<u8"), ("result", "i1"), ("cached", "u1"),\
+	("plies", "u1")])
+_GAME_STRUCT = struct.Struct("<QQbBB")
+
+def agent_id(content_hash):
+	"""
+	id an agent is logged under
+
+	Parameters
+	----------
+	content_hash: bytes
+		as returned by SimpleGenNeuralNet.content_hash
+
+	Returns
+	-------
+	int
+		the first 8 bytes of the hash as a little endian integer
+	"""
+	return int.from_bytes(content_hash[:8], "little")
+
+class GameLog(object):
+	"""
+	Appends games to a log on a background thread
+
+	write packs a batch of games into a chunk with a few array
+	operations and queues it, a thread writes queued chunks to the
+	file so training never waits on the disk
+
+	Attributes
+	----------
+	filename: str
+
+	generation: int
+		generation logged with the games written next, set at the
+		start of each generation
+
+	offset: int
+		byte offset in the file the next chunk will be written at, a
+		reader given it starts from that chunk
+
+	Methods
+	-------
+	write(firsts, seconds, winners, history, cached=None)
+		logs a batch of games
+
+	close()
+		writes every queued chunk and closes the file
+	"""
+	def __init__(self, filename, generation=0):
+		"""
+		Parameters
+		----------
+		filename: str
+			log to append to, created if it does not exist
+
+		generation: int, optional
+			generation of the first games written(defaults to 0)
+
+		Raises
+		------
+		Exception
+			If the file exists and is not a game log
+		"""
+		super(GameLog, self).__init__()
+		self.filename = filename
+		self.generation = generation
+		self._file = open(filename, "ab")
+		if self._file.tell() == 0:
+			self._file.write(MAGIC)
+		else:
+			with open(filename, "rb") as f:
+				if f.read(len(MAGIC)) != MAGIC:
+					self._file.close()
+					raise Exception("{} is not a game log of this version".format(filename))
+		self.offset = self._file.tell()
+		self._queue = queue.Queue()
+		self._error = None
+		self._thread = threading.Thread(target=self._run, daemon=True)
+		self._thread.start()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def write(self, firsts, seconds, winners, history, cached=None):
+		"""
+		logs a batch of games
+
+		Parameters
+		----------
+		firsts, seconds: narray
+			agent_id of the agents that went first and second
+
+		winners: narray
+			1 if the first agent won each game, -1 for the second
+
+		history: narray
+			(games, MAX_PLIES) uint8 column of each move, NO_MOVE after
+			the end of the game, as filled by league.play_batch
+
+		cached: narray, optional
+			whether each result was taken from a MatchCache, the rows of
+			history of those games are all NO_MOVE(defaults to none)
+
+		Raises
+		------
+		Exception
+			If writing an earlier chunk failed
+		"""
+		if self._error is not None:
+			raise self._error
+		if not len(firsts):
+			return
+		moved = history != NO_MOVE
+		games = np.empty(len(firsts), dtype=_GAME)
+		games["first"] = firsts
+		games["second"] = seconds
+		games["result"] = winners
+		games["cached"] = False if cached is None else cached
+		games["plies"] = moved.sum(axis=1)
+		#each game's fields followed by only the moves it made
+		rows = np.concatenate([games.view(np.uint8).reshape(len(games), -1), history], axis=1)
+		keep = np.concatenate([np.ones((len(games), _GAME.itemsize), dtype=bool), moved], axis=1)
+		body = rows[keep].tobytes()
+		self._queue.put(_CHUNK.pack(self.generation, len(games), len(body)) + body)
+		self.offset += _CHUNK.size + len(body)
+
+	def _run(self):
+		while True:
+			chunk = self._queue.get()
+			if chunk is None:
+				break
+			try:
+				self._file.write(chunk)
+			except Exception as error:
+				self._error = error
+
+	def close(self):
+		"""
+		writes every queued chunk and closes the file
+
+		Raises
+		------
+		Exception
+			If writing a chunk failed
+		"""
+		if self._thread is not None:
+			self._queue.put(None)
+			self._thread.join()
+			self._thread = None
+			self._file.flush()
+			os.fsync(self._file.fileno())
+			self._file.close()
+		if self._error is not None:
+			error, self._error = self._error, None
+			raise error
+
+def read(filename, generation=0, offset=None):
+	"""
+	reads the games of a log lazily
+
+	chunks of earlier generations are skipped without reading their
+	games, only one chunk is held in memory at a time
+
+	Parameters
+	----------
+	filename: str
+
+	generation: int, optional
+		first generation read(defaults to 0)
+
+	offset: int, optional
+		byte offset of the chunk to start from, a GameLog's offset
+		taken before the chunk was written(defaults to the first chunk)
+
+	Yields
+	------
+	tuple
+		generation, first, second, result, whether it was cached and
+		the bytes of moves of each game
+
+	Raises
+	------
+	Exception
+		If the file is not a game log
+	"""
+	with open(filename, "rb") as f:
+		if f.read(len(MAGIC)) != MAGIC:
+			raise Exception("{} is not a game log of this version".format(filename))
+		if offset is not None:
+			f.seek(offset)
+		while True:
+			header = f.read(_CHUNK.size)
+			if len(header) < _CHUNK.size:
+				return
+			chunk_generation, count, length = _CHUNK.unpack(header)
+			if chunk_generation < generation:
+				f.seek(length, os.SEEK_CUR)
+				continue
+			body = f.read(length)
+			position = 0
+			for game in range(count):
+				first, second, result, cached, plies = _GAME_STRUCT.unpack_from(body, position)
+				position += _GAME_STRUCT.size
+				yield chunk_generation, first, second, result, bool(cached),\
+					body[position:position + plies]
+				position += plies
@@ -0,0 +1,283 @@
+"""
+Archive of past champions
+
+Classes
+-------
+HallOfFame
+	past top agents kept once each by content hash, for the population
+	to play against
+"""
+
+from random import sample
+import numpy as np
+from . import checkpoint
+from .simple_gen_neural_net import GenomeArena
+
+#what a full hall of fame evicts to make room
+EVICTIONS = ("age", "rating")
+
+class HallOfFame(object):
+	"""
+	Past top agents kept once each by content hash, for the population
+	to play against
+
+	Surviving parents are often the top agents for many generations in
+	a row unchanged, so champions are keyed by their content hash and
+	only agents not already held are added. Genomes are stored as rows
+	of one preallocated array, without a network object for each.
+
+	Once full, adding a champion evicts the oldest, or with the "rating"
+	policy the one with the lowest win rate against the population,
+	counting one won and one lost game for every champion so new
+	champions are not evicted before they have played
+
+	Attributes
+	----------
+	maxsize: int
+		most champions kept
+
+	opponents: int
+		champions sampled to play the population each season
+
+	evict: str
+		one of EVICTIONS
+
+	genomes: narray or None
+		(maxsize, genome length) genomes of the champions in the first
+		len rows, None until the first champion is added
+
+	generations: narray
+		generation each champion was added in
+
+	wins, losses: narray
+		games each champion won and lost against the population
+
+	season_wins, season_games: int
+		games the population won and played against champions in the
+		last season
+
+	Methods
+	-------
+	load(filename, generation=None): HallOfFame
+		reads a hall of fame written by save
+
+	save(filename, generation)
+		writes the champions and their records to a population file
+
+	add(agents, generation): int
+		adds the agents not already held
+
+	sample(count, exclude=()): list of int
+		slots of up to count different champions picked at random
+
+	networks(slots): list of SimpleGenNeuralNet
+		copies of the champions in slots
+
+	record(slots, champion_won)
+		adds the results of games against the population
+	"""
+	def __init__(self, maxsize=256, opponents=4, evict="age"):
+		"""
+		Parameters
+		----------
+		maxsize: int, optional
+			most champions kept(defaults to 256)
+
+		opponents: int, optional
+			champions sampled to play the population each season
+			(defaults to 4)
+
+		evict: str, optional
+			one of EVICTIONS(defaults to "age")
+
+		Raises
+		------
+		Exception
+			If maxsize is less than 1 or evict is not one of EVICTIONS
+		"""
+		super(HallOfFame, self).__init__()
+		if maxsize < 1:
+			raise Exception("a hall of fame must hold at least one champion, maxsize {} was given".format(maxsize))
+		if evict not in EVICTIONS:
+			raise Exception("unknown eviction policy {}, choose from {}".format(evict, EVICTIONS))
+		self.maxsize = maxsize
+		self.opponents = opponents
+		self.evict = evict
+		self.genomes = None
+		self.num_nodes = None
+		self._hashes = []
+		self._slots = {}
+		self.generations = np.zeros(maxsize, dtype=np.int64)
+		self.wins = np.zeros(maxsize, dtype=np.int64)
+		self.losses = np.zeros(maxsize, dtype=np.int64)
+		self.season_wins = 0
+		self.season_games = 0
+
+	def __len__(self):
+		return len(self._hashes)
+
+	def __contains__(self, agent):
+		return agent.content_hash() in self._slots
+
+	def add(self, agents, generation):
+		"""
+		adds the agents not already held
+
+		Parameters
+		----------
+		agents: list of SimpleGenNeuralNet
+			all with the same structure
+
+		generation: int
+			generation the agents were top in
+
+		Returns
+		-------
+		int
+			number of agents added
+		"""
+		added = 0
+		for agent in agents:
+			key = agent.content_hash()
+			if key in self._slots:
+				continue
+			if self.genomes is None:
+				self._allocate(agent.structure())
+			if len(self) < self.maxsize:
+				slot = len(self)
+				self._hashes.append(key)
+			else:
+				slot = self._victim()
+				del self._slots[self._hashes[slot]]
+				self._hashes[slot] = key
+			self._slots[key] = slot
+			self.genomes[slot] = np.concatenate([layer.ravel() for layer in agent.layer_weights])
+			self.generations[slot] = generation
+			self.wins[slot] = 0
+			self.losses[slot] = 0
+			added += 1
+		return added
+
+	def _allocate(self, num_nodes):
+		self.num_nodes = tuple(num_nodes)
+		length = sum((inputs + 1) * size for inputs, size in zip(num_nodes, num_nodes[1:]))
+		self.genomes = np.empty((self.maxsize, length))
+
+	@classmethod
+	def load(cls, filename, generation=None):
+		"""
+		reads a hall of fame written by save
+
+		Parameters
+		----------
+		filename: str
+
+		generation: int, optional
+			generation the hall must have been saved at
+
+		Returns
+		-------
+		HallOfFame
+
+		Raises
+		------
+		Exception
+			If the hall was saved at another generation
+		"""
+		header, arena = checkpoint.read(filename, mmap=False)
+		if generation is not None and header["generation"] != generation:
+			raise Exception("{} holds the hall of fame of generation {}, not {}".format(\
+				filename, header["generation"], generation))
+		hall = cls(header["maxsize"], header["opponents"], header["evict"])
+		hall._allocate(arena.num_nodes)
+		size = len(arena)
+		hall.genomes[:size] = arena.genomes
+		hall._hashes = [network.content_hash() for network in arena.networks]
+		hall._slots = dict((key, slot) for slot, key in enumerate(hall._hashes))
+		hall.generations[:size] = header["generations"]
+		hall.wins[:size] = header["wins"]
+		hall.losses[:size] = header["losses"]
+		hall.season_wins = header["season_wins"]
+		hall.season_games = header["season_games"]
+		return hall
+
+	def save(self, filename, generation):
+		"""
+		writes the champions and their records to a population file
+
+		Parameters
+		----------
+		filename: str
+
+		generation: int
+			generation of the training run the hall is saved at
+		"""
+		size = len(self)
+		checkpoint.write(filename, self.networks(list(range(size))), generation=generation,\
+			maxsize=self.maxsize, opponents=self.opponents, evict=self.evict,\
+			generations=self.generations[:size].tolist(), wins=self.wins[:size].tolist(),\
+			losses=self.losses[:size].tolist(), season_wins=self.season_wins,\
+			season_games=self.season_games)
+
+	def _victim(self):
+		#slot of the champion evicted to make room
+		if self.evict == "age":
+			return int(np.argmin(self.generations))
+		return int(np.argmin((self.wins + 1) / (self.wins + self.losses + 2.0)))
+
+	def sample(self, count, exclude=()):
+		"""
+		slots of up to count different champions picked at random
+
+		takes time in proportion to count and exclude, not the size of
+		the hall
+
+		Parameters
+		----------
+		count: int
+
+		exclude: iterable of bytes, optional
+			content hashes of agents that are not picked, such as the
+			current population
+
+		Returns
+		-------
+		list of int
+		"""
+		excluded = set(self._slots[key] for key in exclude if key in self._slots)
+		#enough are drawn that count remain once the excluded are dropped
+		slots = sample(range(len(self)), min(count + len(excluded), len(self)))
+		return [slot for slot in slots if slot not in excluded][:count]
+
+	def networks(self, slots):
+		"""
+		copies of the champions in slots
+
+		Parameters
+		----------
+		slots: list of int
+
+		Returns
+		-------
+		list of SimpleGenNeuralNet
+		"""
+		return GenomeArena(*self.num_nodes, genomes=self.genomes[slots]).networks
+
+	def record(self, slots, champion_won):
+		"""
+		adds the results of games against the population
+
+		Parameters
+		----------
+		slots: narray of int
+			champion that played each game
+
+		champion_won: narray of boolean
+			whether the champion won each game
+		"""
+		slots = np.asarray(slots, dtype=np.intp)
+		champion_won = np.asarray(champion_won, dtype=bool)
+		np.add.at(self.wins, slots[champion_won], 1)
+		np.add.at(self.losses, slots[~champion_won], 1)
+		self.season_wins = int(np.count_nonzero(~champion_won))
+		self.season_games = len(slots)
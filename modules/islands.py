@@ -0,0 +1,181 @@
+"""
+Island model training across processes
+
+Each island is a separate process with its own league, so islands 
+train independently of each other between migrations. Every 
+migrate_every generations each island sends copies of its top agents
+to the next island of a ring and takes the agents sent to it in place
+of its newest children
+
+Functions
+---------
+run(islands, generations, migrate_every=10, migrants=2, seed=None, **options): list
+	trains islands and returns their final populations
+
+populate_league(finished, target)
+	makes the islands' populations the population of a league in this
+	process
+"""
+
+import multiprocessing
+import queue
+import random
+import numpy as np
+from . import league
+from .cache import MatchCache, MoveMemo
+from .simple_gen_neural_net import GenomeArena
+
+def _genome(island, agent):
+	return island.arena.genomes[island.arena.index(agent)].copy()
+
+def _island(index, seed, inbox, outbox, results, generations, migrate_every,\
+	migrants, filename, batched, tournament, match_cache, move_memo, engine, precision):
+	np.random.seed(seed)
+	random.seed(seed)
+	island = league.League(engine)
+	island.use_precision(precision)
+	if filename is None:
+		island.generate_pop()
+	else:
+		island.populate_from_checkpoint(filename)
+
+	cache = MatchCache(match_cache) if match_cache > 0 else None
+	memo = MoveMemo(move_memo) if move_memo > 0 and not batched else None
+	island.play_season(batched, cache=cache, tournament=tournament, memo=memo)
+	for generation in range(1, generations + 1):
+		parents = island.gather_top()
+		migrating = migrate_every > 0 and generation % migrate_every == 0
+		if migrating:
+			outbox.put([_genome(island, agent) for agent in parents[:migrants]])
+
+		island.repop_from(parents)
+		if migrating:
+			#immigrants take the place of the newest children
+			for agent, genome in zip(reversed(island.population), inbox.get()):
+				island.arena.genomes[island.arena.index(agent)] = genome
+				agent.changed()
+
+		island.play_season(batched, cache=cache, tournament=tournament, memo=memo)
+
+	results.put((index, island.population[0].structure(),\
+		np.stack([_genome(island, agent) for agent in island.population]),\
+		island.standings.tolist()))
+
+def run(islands, generations, migrate_every=10, migrants=2, seed=None, filename=None,\
+	batched=False, tournament=None, match_cache=0, move_memo=0, engine="bitboard",\
+	precision="float64"):
+	"""
+	trains islands and returns their final populations
+
+	Parameters
+	----------
+	islands: int
+		number of islands, each is trained in its own process
+
+	generations: int
+		generations each island is trained for
+
+	migrate_every: int, optional
+		generations between migrations, 0 never migrates(defaults to 10)
+
+	migrants: int, optional
+		top agents each island sends to the next on every migration
+		(defaults to 2)
+
+	seed: int, optional
+		seeds the random numbers of every island, islands are seeded
+		from numpy.random if not given
+
+	filename: str, optional
+		binary population file every island starts from, each starts 
+		with a random population if not given
+
+	batched: boolean, optional
+		play seasons with the batched engine(defaults to False)
+
+	tournament: RoundRobin, SwissTournament or SampledTournament, optional
+		schedules the games of each season
+
+	match_cache: int, optional
+		size of each island's MatchCache, 0 disables it(defaults to 0)
+
+	move_memo: int, optional
+		size of each island's MoveMemo, only used when seasons are not
+		batched, 0 disables it(defaults to 0)
+
+	engine: str, optional
+		key of game.ENGINES used for the islands' games
+		(defaults to "bitboard")
+
+	precision: str, optional
+		precision the islands' agents choose moves at
+		(defaults to "float64")
+
+	Returns
+	-------
+	list of tuples
+		the network structure, the (P, genome length) genomes and the
+		standings of each island's final population, in island order
+
+	Raises
+	------
+	Exception
+		If an island's process fails
+	"""
+	if islands < 1:
+		raise Exception("at least one island is needed, {} were given".format(islands))
+	if not 0 <= migrants <= min(league.SURVIVE_MIN, league.POP_SIZE - league.SURVIVE_MAX):
+		raise Exception("between 0 and {} agents can migrate, {} were given".format(\
+			min(league.SURVIVE_MIN, league.POP_SIZE - league.SURVIVE_MAX), migrants))
+
+	if seed is None:
+		seed = np.random.randint(2**31)
+	seeds = np.random.RandomState(seed).randint(2**31, size=islands)
+
+	inboxes = [multiprocessing.Queue() for i in range(islands)]
+	results = multiprocessing.Queue()
+	processes = []
+	for index in range(islands):
+		#island i sends to island i+1 and receives from island i-1
+		process = multiprocessing.Process(target=_island, args=(index, int(seeds[index]),\
+			inboxes[index], inboxes[(index + 1) % islands], results, generations,\
+			migrate_every, migrants, filename, batched, tournament, match_cache, move_memo,\
+			engine, precision))
+		process.start()
+		processes.append(process)
+
+	finished = [None] * islands
+	try:
+		for i in range(islands):
+			while True:
+				try:
+					result = results.get(timeout=1.0)
+					break
+				except queue.Empty:
+					if any(process.exitcode not in (None, 0) for process in processes):
+						raise Exception("an island process failed")
+			finished[result[0]] = result[1:]
+	finally:
+		for process in processes:
+			if None in finished:
+				process.terminate()
+			process.join()
+
+	return finished
+
+def populate_league(finished, target):
+	"""
+	makes the islands' populations the population of a league in this
+	process, one island after another
+
+	Parameters
+	----------
+	finished: list of tuples
+		returned by run
+
+	target: League
+		league the populations are put in
+	"""
+	genomes = np.concatenate([island[1] for island in finished])
+	standings = [record for island in finished for record in island[2]]
+	target.populate_from_arena(GenomeArena(*finished[0][0], genomes=genomes), standings)
@@ -18,84 +18,597 @@ SURVIVE_MIN, SURVIVE_MAX: int
 MUTATED_NODES: int
 	number of nodes mutated on each child
 
+INITIAL_RATING: float
+	rating of every agent at the start of a rated season
+
+ELO_K: float
+	most an Elo rating changes after one game
+
+RATINGS: tuple
+	rating systems a tournament can use, None ranks agents by wins
+
+TOURNAMENTS: dict of str to class
+	the available tournament schedulers by name
+
 Globals
 -------
-population: list of SimpleGenNeuralNet
+counters: dict of str to int
+	running totals of games played, plies played and forward passes
+	made to choose moves by every league in the process, games with
+	cached results are not counted
 
-standings: list of lists with 2 ints 
-	wins and losses of the record corresponding 
-	SimpleGenNeuralNet in population
+Classes
+-------
+League
+	a population of agents and their results
 
-Funcitons
----------
-generate_pop()
-	fills population list with random initial population
+RoundRobin
+	schedules a season where each agent plays each other agent twice
 
-export()
-	returns a respresentation of the population in python lists
+SwissTournament
+	schedules a season of Swiss rounds
 
-populate_from_export(export)
-	rebuilds population from an export
+SampledTournament
+	schedules a season where each agent plays a random sample of 
+	opponents
 
-play_game(agent1, agent2)
+RacingTournament
+	schedules rounds that eliminate the weakest agents until only
+	contenders for survival are left
+
+Funcitons
+---------
+play_game(agent1, agent2, cache=None, memo=None, engine=Game)
 	plays a game of connect four between two agents
 
+play_batch(agents, pairings)
+	plays many games of connect four at once
+
 choose_move(agent,board,player)
 	returns the agent's most confident move given the board
 
-play_season()
-	each agent plays each other agent twice
-
-print_standings()
-	prints the win/loss records of each agent
+top_indices(fitness, n=SURVIVE_MIN, nmax=SURVIVE_MAX): narray
+	returns the indices of between n and nmax of the fittest agents
 
-gather_top(n=SURVIVE_MIN, nmax=SURVIVE_MAX)
-	returns a number between n and nmax of agents with the most wins
+reference_positions(count=1000, seed=0): narray
+	positions from games of random moves
 
-repop_from(parents)
-	refills the population to POP_SIZE from genetic algorithms performed on parents
+argmax_disagreement(agents, precision, positions): float
+	fraction of moves chosen at a precision that differ from float64
 """
 
-from random import sample
+import math
+from random import sample, shuffle
 import numpy as np
-from .game import Game
-from .simple_gen_neural_net import SimpleGenNeuralNet
+from . import checkpoint
+from .game import COLUMNS, ENGINES, ROWS, BatchGame, Game
+from .game_log import MAX_PLIES, NO_MOVE, agent_id
+from .simple_gen_neural_net import PRECISIONS, GenomeArena, SimpleGenNeuralNet, StackedNetworks
 
 POP_SIZE = 50
 SURVIVE_MIN = 5
 SURVIVE_MAX = 10
 NET_STRUCT = (42,25,7)
 MUTATED_NODES = 2
+INITIAL_RATING = 1500.0
+ELO_K = 32.0
+RATINGS = (None, "elo", "bradley-terry")
 
-population=[]
-standings=[] #[wins, losses]
+counters = {"games": 0, "plies": 0, "forward_passes": 0}
 
-def populate_from_export(export):
-	"""
-	returns a respresentation of the population in python lists
+class League(object):
 	"""
-	global population
-	global standings
-	population = [SimpleGenNeuralNet.from_export(agent) for agent in export]
-	standings = [[0,0] for agent in export]
+	A population of agents and their results
 
-def export():
-	"""
-	rebuilds population from an export
-	"""
-	return [agent.export() for agent in population]
+	organizes competition between the agents and keeps record
+	prunes under performing agents and refills with crossover and mutation.
+	Leagues keep no shared state so several can be used side by side
 
-def generate_pop():
-	"""
-	fills population list with random initial population
+	Attributes
+	----------
+	population: list of SimpleGenNeuralNet
+
+	standings: narray
+		(P, 2) wins and losses of the corresponding agent in population
+
+	results: narray
+		(P, P) int8 result of the latest game between each pair of 
+		agents with the row's agent going first, 1 if it won, -1 if it
+		lost and 0 if they have not played
+
+	games: int
+		games in the last season, including games with cached results
+
+	ratings: narray or None
+		rating of the corresponding agent in population after a rated
+		season, None when agents are ranked by wins
+
+	engine: class
+		game engine used for league games, one of game.ENGINES
+
+	precision: str
+		precision the agents choose moves at, one of PRECISIONS
+
+	arena: GenomeArena
+		stores the genomes of population, culled agents' rows are 
+		reused by repop_from to hold new children
+
+	reused, allocated: int
+		rows of arena the last repop_from reused from culled agents for
+		children, and rows it newly allocated because the parents were
+		not in arena
 
-	values of the nodes wieghts and biases are in the interval [0.0, 1.0)
+	Methods
+	-------
+	use_engine(name)
+		selects the game engine used for league games
+
+	use_precision(precision)
+		selects the precision agents choose moves at
+
+	generate_pop()
+		fills population list with random initial population
+
+	export(): dict
+		returns a respresentation of the population, standings and 
+		ranking in python lists
+
+	populate_from_export(export)
+		rebuilds population from an export
+
+	populate_from_checkpoint(filename, restore_standings=False): dict
+		rebuilds population from a binary population file
+
+	populate_from_arena(source, records=None)
+		rebuilds population from every network of a GenomeArena
+
+	save_checkpoint(filename, generation=0, writer=None, **metadata)
+		writes population, standings and ranking to a binary population
+		file
+
+	play_season(batched=False, pool=None, cache=None, tournament=None, memo=None, hall_of_fame=None)
+		each agent plays each other agent twice, or as scheduled by 
+		tournament, and then champions from a hall of fame
+
+	print_standings()
+		prints the win/loss records of each agent
+
+	ranking(): list of int
+		indices of population from best to worst
+
+	gather_top(n=SURVIVE_MIN, nmax=SURVIVE_MAX): list of SimpleGenNeuralNet
+		returns a number between n and nmax of agents with the most 
+		wins or highest ratings
+
+	repop_from(parents)
+		refills the population to POP_SIZE from genetic algorithms 
+		performed on parents
 	"""
-	for i in range(1,POP_SIZE+1):
-		population.append(SimpleGenNeuralNet.from_random(*NET_STRUCT))
-		standings.append([0,0])
+	def __init__(self, engine="bitboard"):
+		"""
+		Parameters
+		----------
+		engine: str, optional
+			key of game.ENGINES used for league games
+			(defaults to "bitboard")
+		"""
+		super(League, self).__init__()
+		self.population = []
+		self.arena = None
+		self.reused = 0
+		self.allocated = 0
+		self.games = 0
+		self.precision = "float64"
+		self.use_engine(engine)
+		self._reset_results()
+
+	def _reset_results(self):
+		size = len(self.population)
+		self.standings = np.zeros((size, 2), dtype=np.int64)
+		self.results = np.zeros((size, size), dtype=np.int8)
+		self.ratings = None
+
+	def use_engine(self, name):
+		"""
+		selects the game engine used for league games
+
+		Parameters
+		----------
+		name: str
+			key of game.ENGINES, "bitboard" or "legacy"
+		"""
+		if name not in ENGINES:
+			raise Exception("unknown game engine {}, choose from {}".format(name, sorted(ENGINES)))
+		self.engine = ENGINES[name]
+
+	def use_precision(self, precision):
+		"""
+		selects the precision agents choose moves at
+
+		the genomes are always kept in float64, lower precisions are
+		only used to choose moves
+
+		Parameters
+		----------
+		precision: str
+			one of PRECISIONS, "float64", "float32" or "int8"
+		"""
+		if precision not in PRECISIONS:
+			raise Exception("unknown precision {}, choose from {}".format(precision, PRECISIONS))
+		self.precision = precision
+
+	def populate_from_export(self, export):
+		"""
+		rebuilds population from an export
+
+		Parameters
+		----------
+		export: dict or list
+			returned by export, or the list of agents exported by older 
+			versions
+		"""
+		if isinstance(export, dict):
+			export = export["agents"]
+		self.population = self._store_in_arena([SimpleGenNeuralNet.from_export(agent)\
+			for agent in export])
+		self._reset_results()
+
+	def populate_from_checkpoint(self, filename, restore_standings=False):
+		"""
+		rebuilds population from a binary population file
+
+		the file's genomes are memory mapped and used as the arena when 
+		there is room for POP_SIZE agents in it
+
+		Parameters
+		----------
+		filename: str
+			file written by save_checkpoint or checkpoint.convert
+
+		restore_standings: boolean, optional
+			take standings and ratings from the file instead of starting 
+			every agent with no wins or losses(defaults to False)
 
-def play_game(agent1, agent2):
+		Returns
+		-------
+		dict
+			the header of the file
+		"""
+		header, loaded = checkpoint.read(filename)
+		if restore_standings and header["standings"] is not None:
+			self.populate_from_arena(loaded, header["standings"])
+			if header.get("ratings"):
+				self.ratings = np.array(header["ratings"], dtype=np.float64)
+		else:
+			self.populate_from_arena(loaded)
+		return header
+
+	def populate_from_arena(self, source, records=None):
+		"""
+		rebuilds population from every network of a GenomeArena
+
+		the arena is used without copying when there is room for 
+		POP_SIZE agents in it
+
+		Parameters
+		----------
+		source: GenomeArena
+
+		records: list of lists with 2 ints, optional
+			standings of the networks, every agent starts with no wins
+			or losses if not given
+		"""
+		if len(source) >= POP_SIZE:
+			self.arena = source
+			self.population = list(source.networks)
+		else:
+			self.population = self._store_in_arena(source.networks)
+		self._reset_results()
+		if records is not None:
+			self.standings[:] = records
+
+	def save_checkpoint(self, filename, generation=0, writer=None, **metadata):
+		"""
+		writes population, standings and ranking to a binary population 
+		file
+
+		Parameters
+		----------
+		filename: str
+
+		generation: int, optional
+			number of generations the population has been trained for
+			(defaults to 0)
+
+		writer: checkpoint.SnapshotWriter, optional
+			writes the file on its background thread instead of before
+			returning
+
+		metadata - keyword:
+			any other json serializable values to keep in the header
+		"""
+		write = writer.write if writer is not None else checkpoint.write
+		ratings = self.ratings.tolist() if self.ratings is not None else []
+		write(filename, self.population, self.standings.tolist(), generation,\
+			ratings=ratings, ranking=self.ranking(), **metadata)
+
+	def export(self):
+		"""
+		returns a respresentation of the population, standings and 
+		ranking in python lists
+
+		Returns
+		-------
+		dict
+			agents, standings and ranking, can be given to 
+			populate_from_export
+		"""
+		return {
+			"agents": [agent.export() for agent in self.population],
+			"standings": self.standings.tolist(),
+			"ranking": self.ranking()
+		}
+
+	def generate_pop(self):
+		"""
+		fills population list with random initial population
+
+		values of the nodes wieghts and biases are in the interval [0.0, 1.0)
+		"""
+		self.arena = GenomeArena(*NET_STRUCT, size=POP_SIZE)
+		self.arena.randomize(range(POP_SIZE))
+		self.population = list(self.arena.networks)
+		self._reset_results()
+
+	def _store_in_arena(self, networks):
+		#copies networks into a new arena with room for POP_SIZE agents
+		#and returns the arena's views of them
+		self.arena = GenomeArena(*networks[0].structure(), size=max(POP_SIZE, len(networks)))
+		for row, network in enumerate(networks):
+			for layer, matrix in zip(self.arena.layers, network.layer_weights):
+				layer[row] = matrix
+		return self.arena.networks[:len(networks)]
+
+	def play_season(self, batched=False, pool=None, cache=None, tournament=None, memo=None,\
+		hall_of_fame=None, game_log=None):
+		"""
+		each agent plays each other agent twice
+
+		updates standings and results, and ratings when the tournament
+		is rated
+
+		Parameters
+		----------
+		batched: boolean, optional
+			play every game of a round at once with play_batch rather
+			than one at a time with play_game(defaults to False)
+
+		pool: parallel.SeasonPool, optional
+			split the games of the season across the pool's worker 
+			processes, games are batched within each worker
+
+		cache: MatchCache, optional
+			results of earlier games, only games with no cached result 
+			are played and their results are added to the cache
+
+		tournament: RoundRobin, SwissTournament or SampledTournament, optional
+			schedules the games of the season(defaults to a RoundRobin)
+
+		memo: MoveMemo, optional
+			moves remembered by agent and position, only used when 
+			games are played one at a time
+
+		hall_of_fame: HallOfFame, optional
+			after the tournament every agent plays the same sample of
+			champions from the hall once going first and once second,
+			these games count towards standings but not ratings.
+			Champions still in the population are not sampled
+
+		game_log: GameLog, optional
+			every game is logged with its moves, games taken from cache
+			are logged as cached and without moves
+		"""
+		if tournament is None:
+			tournament = RoundRobin()
+		size = len(self.population)
+		self.ratings = np.full(size, INITIAL_RATING) if tournament.rating else None
+		self.games = 0
+		#winner * size + loser of every game, for bradley-terry fits
+		pairs = []
+
+		for round in range(tournament.rounds):
+			scores = self.ratings if self.ratings is not None else self.standings[:, 0]
+			records = tournament.pairings(round, scores)
+			if not records:
+				continue
+			winners = self._play_records(records, batched, pool, cache, memo, game_log)
+			self.games += len(records)
+			firsts, seconds = np.array(records, dtype=np.intp).T
+			first_won = np.asarray(winners) == 1
+			winning = np.where(first_won, firsts, seconds)
+			losing = np.where(first_won, seconds, firsts)
+			np.add.at(self.standings[:, 0], winning, 1)
+			np.add.at(self.standings[:, 1], losing, 1)
+			if tournament.rating == "bradley-terry":
+				pairs.append(winning * size + losing)
+			self.results[firsts, seconds] = np.where(first_won, 1, -1)
+
+			if tournament.rating == "elo":
+				self._update_elo(records, winners)
+			elif tournament.rating == "bradley-terry":
+				self.ratings = _fit_bradley_terry(size, np.concatenate(pairs))
+
+		if hall_of_fame is not None and len(hall_of_fame):
+			self._play_hall_of_fame(hall_of_fame, batched, pool, cache, memo, game_log)
+
+	def _play_hall_of_fame(self, hall_of_fame, batched, pool, cache, memo, game_log):
+		#champions are indexed after the population in the records
+		#champions still in the population would only replay its own games
+		size = len(self.population)
+		slots = hall_of_fame.sample(hall_of_fame.opponents,\
+			[agent.content_hash() for agent in self.population])
+		if not slots:
+			hall_of_fame.record([], [])
+			return
+		agents = self.population + hall_of_fame.networks(slots)
+		records = [(agent, size + champion) for agent in range(size)\
+			for champion in range(len(slots))]
+		records += [(second, first) for first, second in records]
+		winners = self._play_records(records, batched, pool, cache, memo, game_log, agents)
+		self.games += len(records)
+
+		firsts, seconds = np.array(records, dtype=np.intp).T
+		agent_first = firsts < size
+		agent_won = (np.asarray(winners) == 1) == agent_first
+		players = np.where(agent_first, firsts, seconds)
+		np.add.at(self.standings[:, 0], players[agent_won], 1)
+		np.add.at(self.standings[:, 1], players[~agent_won], 1)
+		champions = np.where(agent_first, seconds, firsts) - size
+		hall_of_fame.record(np.asarray(slots, dtype=np.intp)[champions], ~agent_won)
+
+	def _play_records(self, records, batched, pool, cache, memo, game_log, agents=None):
+		#winner of each pairing of indices in agents, the population 
+		#unless given
+		population = self.population if agents is None else agents
+		winners = [None] * len(records)
+		if cache is not None:
+			hashes = [agent.content_hash() for agent in population]
+			winners = [cache.get(hashes[first], hashes[second]) for first, second in records]
+
+		unplayed = [index for index, winner in enumerate(winners) if winner is None]
+		pairings = [records[index] for index in unplayed]
+		history = None
+		if game_log is not None:
+			history = np.empty((len(pairings), MAX_PLIES), dtype=np.uint8)
+		if pool is not None:
+			played = pool.play(population, pairings, self.precision, history)
+		elif not batched:
+			for agent in population:
+				agent.use_precision(self.precision)
+			moves = [[] if history is not None else None for pairing in pairings]
+			played = [play_game(population[first], population[second], memo=memo,\
+				engine=self.engine, history=game) for (first, second), game in zip(pairings, moves)]
+			if history is not None:
+				history[:] = NO_MOVE
+				for row, game in enumerate(moves):
+					history[row, :len(game)] = game
+		elif self.arena is not None and all(agent in self.arena for agent in population):
+			#play from the arena's stacked layers, without copying them
+			#at float64
+			rows = [self.arena.index(agent) for agent in population]
+			played = play_batch(self.arena.stack(self.precision),\
+				[(rows[first], rows[second]) for first, second in pairings], history)
+		else:
+			played = play_batch(StackedNetworks(population, self.precision), pairings, history)
+
+		for index, winner in zip(unplayed, played):
+			winners[index] = winner
+			if cache is not None:
+				first, second = records[index]
+				cache.put(hashes[first], hashes[second], winner)
+
+		if game_log is not None and records:
+			#cached games are logged too, without moves
+			if cache is None:
+				hashes = [agent.content_hash() for agent in population]
+			ids = np.array([agent_id(key) for key in hashes], dtype=np.uint64)
+			firsts, seconds = np.array(records, dtype=np.intp).T
+			moves = np.full((len(records), MAX_PLIES), NO_MOVE, dtype=np.uint8)
+			moves[unplayed] = history
+			cached = np.ones(len(records), dtype=bool)
+			cached[unplayed] = False
+			game_log.write(ids[firsts], ids[seconds], winners, moves, cached)
+
+		return winners
+
+	def _update_elo(self, records, winners):
+		ratings = self.ratings
+		for (first, second), winner in zip(records, winners):
+			expected = 1.0 / (1.0 + 10.0 ** ((ratings[second] - ratings[first]) / 400.0))
+			change = ELO_K * ((1.0 if winner == 1 else 0.0) - expected)
+			ratings[first] += change
+			ratings[second] -= change
+
+	def print_standings(self):
+		"""
+		prints the win/loss records of each agent
+		"""
+		for record in self.standings.tolist():
+			print(record)
+
+	def _fitness(self):
+		return self.ratings if self.ratings is not None else self.standings[:, 0]
+
+	def ranking(self):
+		"""
+		indices of population from best to worst
+
+		agents are in the order gather_top takes them, so the first n 
+		of the ranking are the agents gather_top returns before ties
+
+		Returns
+		-------
+		list of int
+			empty if no games have been played since the population was
+			made
+		"""
+		if self.ratings is None and not self.standings.any():
+			return []
+		return np.argsort(-self._fitness(), kind="stable").tolist()
+
+	def gather_top(self, n=SURVIVE_MIN, nmax=SURVIVE_MAX):
+		"""
+		returns a number between n and nmax of agents with the most 
+		wins, or the highest ratings after a rated season
+
+		any agents added after n number are because they are tied in 
+		fitness with it's predecessor, ties are taken in population order
+
+		Parameters
+		----------
+		n: int, optional
+			the minimum number of top agents returned(defaults to SURVIVE_MIN)
+		nmax: int, optional
+			the maximum number of top agents returned(defaults to SURVIVE_MAX)
+		"""
+		return [self.population[index] for index in top_indices(self._fitness(), n, nmax)]
+
+	def repop_from(self, parents):
+		"""
+		refills the population to POP_SIZE from genetic algorithms 
+		performed on parents
+
+		Two parants are chosen at random to crossover and then the child
+		is mutated. Children are bred together in the rows of arena held
+		by culled agents
+
+		Parameters
+		----------
+		parents : list of SimpleGenNeuralNet
+		the agents used to repopulate.
+		Should be length less than POP_SIZE
+		"""
+		arena = self.arena
+		self.allocated = 0
+		if arena is None or not all(parent in arena for parent in parents):
+			parents = self._store_in_arena(parents)
+			arena = self.arena
+			self.allocated = len(arena)
+
+		#rows of culled agents are reused for the children of this generation
+		rows = [arena.index(parent) for parent in parents]
+		survivors = set(rows)
+		children = [row for row in range(len(arena)) if row not in survivors]
+		children = children[:POP_SIZE - len(parents)]
+		parent_samples = [sample(rows, 2) for child in children]
+		arena.breed([pair[0] for pair in parent_samples],\
+			[pair[1] for pair in parent_samples], children, MUTATED_NODES)
+		self.reused = 0 if self.allocated else len(children)
+
+		self.population = parents + [arena.networks[row] for row in children]
+		self._reset_results()
+
+def play_game(agent1, agent2, cache=None, memo=None, engine=Game, history=None):
 	"""
 	plays a game of connect four between two agents
 
@@ -105,23 +618,208 @@ def play_game(agent1, agent2):
 		players of the game
 		agent1 goes first
 
+	cache: MatchCache, optional
+		results of earlier games to reuse and add this game to
+
+	memo: MoveMemo, optional
+		moves the agents chose earlier in the same positions
+
+	engine: class, optional
+		game engine the game is played with, one of game.ENGINES
+		(defaults to Game)
+
+	history: list, optional
+		the column of each move is appended to it, nothing is appended
+		when the result is taken from cache
+
 	Returns
 	-------
 	int
 		1 if agent 1 won the game, -1 for agent 2
 	"""
-	game=Game()
+	if cache is not None:
+		first, second = agent1.content_hash(), agent2.content_hash()
+		winner = cache.get(first, second)
+		if winner is None:
+			winner = play_game(agent1, agent2, memo=memo, engine=engine, history=history)
+			cache.put(first, second, winner)
+		return winner
+
+	game=engine()
 	agents = {1:agent1, -1:agent2}
-	move = choose_move(agents[game.current_player],\
-	game.board, game.current_player)
-	while game.can_place(move) and (not game.check_win_with(move)):
-		move = choose_move(agents[game.current_player],\
-		game.board, game.current_player)
+	plies = 0
+	won = False
+	hits = memo.hits if memo is not None else 0
+	move = _choose(agents[game.current_player], game, memo)
+	while game.can_place(move):
+		plies += 1
+		if history is not None:
+			history.append(move)
+		if game.check_win_with(move):
+			won = True
+			break
+		move = _choose(agents[game.current_player], game, memo)
+	if history is not None and not won:
+		history.append(move)
+
+	if memo is not None:
+		hits = memo.hits - hits
+	counters["games"] += 1
+	counters["plies"] += plies
+	counters["forward_passes"] += (plies if won else plies + 1) - hits
+	#a move into a full column forfeits the game
+	return game.current_player if won else game.current_player * -1
+
+def _choose(agent, game, memo):
+	if memo is None:
+		return choose_move(agent, game.inputs, game.current_player)
+
+	key = game.key()
+	move = memo.get(agent, key)
+	if move is None:
+		move = choose_move(agent, game.inputs, game.current_player)
+		memo.put(agent, key, move)
+	return move
+
+def play_batch(agents, pairings, history=None):
+	"""
+	plays many games of connect four at once
+
+	the games are stepped together in a BatchGame and the moves of every
+	unfinished game are chosen with one stacked inference call per ply
+
+	Parameters
+	----------
+	agents: list of SimpleGenNeuralNet or StackedNetworks
+		agents taking part, all with the same structure
+
+	pairings: list of tuples of two ints
+		indices in agents of the players of each game, the first of 
+		each pair goes first
+
+	history: narray, optional
+		(len(pairings), MAX_PLIES) uint8 the column of each move of 
+		each game is written to, with NO_MOVE after the game ended
+
+	Returns
+	-------
+	narray
+		winner of each game, 1 if the first agent of the pairing won
+		the game, -1 for the second
+	"""
+	stack = agents if isinstance(agents, StackedNetworks) else StackedNetworks(agents)
+	pairings = np.asarray(pairings, dtype=np.intp).reshape(-1, 2)
+	games = BatchGame(len(pairings))
+	moves = np.zeros(len(pairings), dtype=np.intp)
+	if history is not None:
+		history[:] = NO_MOVE
+	live = games.live()
+	ply = 0
+	while live.size:
+		players = games.current_player[live]
+		indices = np.where(players == 1, pairings[live, 0], pairings[live, 1])
+		inputs = games.boards[live].reshape(live.size, -1) * players[:, None]
+		moves[live] = stack.choose(indices, inputs)
+		counters["forward_passes"] += live.size
+		if history is not None:
+			#games are played in lockstep so every live game is at this ply
+			history[live, ply] = moves[live]
+		games.play(moves)
+		live = games.live()
+		ply += 1
+
+	counters["games"] += len(pairings)
+	counters["plies"] += int(np.count_nonzero(games.boards))
+	return games.winner
+
+def top_indices(fitness, n=SURVIVE_MIN, nmax=SURVIVE_MAX):
+	"""
+	returns the indices of between n and nmax of the fittest agents
+
+	any agents added after n number are because they are tied in 
+	fitness with it's predecessor, ties are taken in index order
+
+	Parameters
+	----------
+	fitness: narray
+		wins or rating of each agent
+
+	n: int, optional
+		the minimum number of indices returned(defaults to SURVIVE_MIN)
+
+	nmax: int, optional
+		the maximum number of indices returned(defaults to SURVIVE_MAX)
+
+	Returns
+	-------
+	narray
+		indices from the fittest agent down
+	"""
+	fitness = np.asarray(fitness)
+	n = min(n, len(fitness))
+	nmax = min(nmax, len(fitness))
+	#fitness of the nth best agent, every agent above it is taken and
+	#agents tied with it fill the rest up to nmax in index order
+	cut = np.partition(fitness, len(fitness) - n)[len(fitness) - n]
+	above = np.flatnonzero(fitness > cut)
+	tied = np.flatnonzero(fitness == cut)[:nmax - len(above)]
+	top = np.concatenate([above, tied])
+	return top[np.argsort(-fitness[top], kind="stable")]
+
+def reference_positions(count=1000, seed=0):
+	"""
+	positions from games of random moves, as the player to move sees 
+	them
+
+	Parameters
+	----------
+	count: int, optional
+		number of positions(defaults to 1000)
+
+	seed: int, optional
+		seed of the random moves(defaults to 0)
+
+	Returns
+	-------
+	narray
+		(count, ROWS * COLUMNS) boards multiplied by the player to move
+	"""
+	rng = np.random.RandomState(seed)
+	positions = []
+	while len(positions) < count:
+		game = Game()
+		for ply in range(rng.randint(ROWS * COLUMNS)):
+			move = rng.choice([column for column in range(COLUMNS) if game.can_place(column)])
+			if game.check_win_with(move):
+				break
+		else:
+			positions.append(np.array(game.board, dtype=np.float64).ravel() * game.current_player)
+	return np.array(positions)
+
+def argmax_disagreement(agents, precision, positions):
+	"""
+	fraction of moves chosen at a precision that differ from float64
+
+	Parameters
+	----------
+	agents: list of SimpleGenNeuralNet
 
-	if not game.can_place(move):
-		game.current_player *= -1
+	precision: str
+		one of PRECISIONS
 
-	return game.current_player
+	positions: narray
+		(N, input nodes) positions every agent chooses a move in, such
+		as from reference_positions
+
+	Returns
+	-------
+	float
+	"""
+	indices = np.repeat(np.arange(len(agents)), len(positions))
+	inputs = np.tile(positions, (len(agents), 1))
+	full = StackedNetworks(agents).choose(indices, inputs)
+	reduced = StackedNetworks(agents, precision).choose(indices, inputs)
+	return float(np.mean(full != reduced))
 
 def choose_move(agent, board, player):
 	"""
@@ -132,92 +830,328 @@ def choose_move(agent, board, player):
 	agent: SimpleGenNeuralNet
 		agent making the decision
 
-	board: list of lists of int
+	board: list of lists of int or narray
 		a matrix of lists representing the board
 		agent's pieces are represented by 1s
 		opponenets pieces are represented by -1s
-		open slots are represented by 0s
+		open slots are represented by 0s, a Game's inputs is chosen
+		from without allocating
 
 	player: int
 		represents what player the agent is. 1 for first, -1 for second
 	"""
-	input_nodes = np.array(board).flatten()*player
-	output_nodes = agent.feed_forward(input_nodes)
-	return np.argmax(output_nodes)
+	return agent.choose(board, player)
 
-def play_season():
+def _fit_bradley_terry(size, pairs, iterations=50):
+	#minorization-maximization fit of each agent's strength from the
+	#winner * size + loser of every game, only pairs that played are
+	#visited. Every agent is also given one drawn game against an agent
+	#of strength 1 so agents that never won have a rating
+	pairs, counts = np.unique(pairs, return_counts=True)
+	winners, losers = np.divmod(pairs, size)
+	total_wins = np.bincount(winners, counts, minlength=size) + 0.5
+	strength = np.ones(size)
+	for i in range(iterations):
+		games = counts / (strength[winners] + strength[losers])
+		expected = np.bincount(winners, games, minlength=size)\
+			+ np.bincount(losers, games, minlength=size)
+		strength = total_wins / (expected + 1.0 / (strength + 1.0))
+		strength /= np.exp(np.mean(np.log(strength)))
+	return INITIAL_RATING + 400.0 * np.log10(strength)
+
+class RoundRobin(object):
 	"""
-	each agent plays each other agent twice
+	Schedules a season where each agent plays each other agent twice,
+	once going first
+
+	Attributes
+	----------
+	rounds: int
+		always 1
 
-	updates standings
+	rating: str or None
+		"elo", "bradley-terry" or None to rank agents by wins
 	"""
-	for first_player, first_record in zip(population, standings):
-		for second_player, second_record in zip(population, standings):
-			if first_player != second_player:
-				if play_game(first_player, second_player) == 1 :
-					first_record[0] += 1
-					second_record[1] += 1
-				else:
-					first_record[1] += 1
-					second_record[0] += 1
+	def __init__(self, rating=None):
+		"""
+		Parameters
+		----------
+		rating: str, optional
+			"elo", "bradley-terry" or None to rank agents by wins
+			(defaults to None)
+		"""
+		super(RoundRobin, self).__init__()
+		self.rounds = 1
+		self.rating = _check_rating(rating)
 
-def print_standings():
+	def pairings(self, round, scores):
+		"""
+		returns the games of a round as pairs of population indices,
+		the first of each pair goes first
+
+		Parameters
+		----------
+		round: int
+			round of the season starting from 0
+
+		scores: list of numbers
+			the rating, or wins when unrated, of each agent so far
+		"""
+		return [(first, second) for first in range(len(scores))\
+			for second in range(len(scores)) if first != second]
+
+class SwissTournament(object):
 	"""
-	prints the win/loss records of each agent
+	Schedules a season of Swiss rounds
+
+	Each round agents are ordered by their score so far and paired with
+	the next closest agent they have not played yet this season. Each
+	pair plays two games so both go first once, an odd agent out sits
+	the round out. A season is 2 * rounds games per agent
+
+	Attributes
+	----------
+	rounds: int
+		number of rounds in a season
+
+	rating: str or None
+		"elo", "bradley-terry" or None to rank agents by wins
 	"""
-	for record in standings:
-		print(record)
+	def __init__(self, rounds=7, rating="elo"):
+		"""
+		Parameters
+		----------
+		rounds: int, optional
+			number of rounds in a season(defaults to 7)
+
+		rating: str, optional
+			"elo", "bradley-terry" or None to rank agents by wins
+			(defaults to "elo")
+		"""
+		super(SwissTournament, self).__init__()
+		self.rounds = rounds
+		self.rating = _check_rating(rating)
+		self._played = set()
+
+	def pairings(self, round, scores):
+		"""
+		returns the games of a round as pairs of population indices,
+		the first of each pair goes first
+
+		Parameters
+		----------
+		round: int
+			round of the season starting from 0
+
+		scores: list of numbers
+			the rating, or wins when unrated, of each agent so far
+		"""
+		if round == 0:
+			self._played = set()
+
+		unpaired = sorted(range(len(scores)), key=lambda index: scores[index], reverse=True)
+		pairings = []
+		while len(unpaired) > 1:
+			first = unpaired.pop(0)
+			#closest agent not yet played, or the closest if all were
+			second = next((other for other in unpaired\
+				if (first, other) not in self._played), unpaired[0])
+			unpaired.remove(second)
+			self._played.add((first, second))
+			self._played.add((second, first))
+			pairings.append((first, second))
+			pairings.append((second, first))
 
-def _wins(item):
-	return item[1][0]
+		return pairings
 
-def gather_top(n=SURVIVE_MIN, nmax=SURVIVE_MAX):
+class SampledTournament(object):
 	"""
-	returns a number between n and nmax of agents with the most wins
+	Schedules a season where each agent plays a random sample of 
+	opponents
 
-	any agents added after n number are because they are tied in fitness
-	with it's predecessor
+	Every agent plays two games, once going first, against each of 
+	opponents other agents picked at random, so a season is about
+	4 * opponents games per agent
 
-	Parameters
+	Attributes
 	----------
-	n: int, optional
-		the minimum number of top agents returned(defaults to SURVIVE_MIN)
-	nmax: int, optional
-		the maximum number of top agents returned(defaults to SURVIVE_MAX)
+	rounds: int
+		always 1
+
+	opponents: int
+		number of opponents sampled for each agent
+
+	rating: str or None
+		"elo", "bradley-terry" or None to rank agents by wins
 	"""
-	ordered = list(zip(population, standings))
-	ordered_itt = iter(ordered)
-	ordered.sort(key = _wins, reverse = True)
-	top = []
-	index = 1
-	indexed = next(ordered_itt)
-	#loop until we have n number of agents in pop, add extra if there are ties
-	#all the while never going over nmax
-	while index <= nmax and (index<n+1 or _wins(top[-1]) == _wins(indexed)):
-		top.append(indexed)
-		indexed = next(ordered_itt)
-		index += 1
+	def __init__(self, opponents=8, rating="elo"):
+		"""
+		Parameters
+		----------
+		opponents: int, optional
+			number of opponents sampled for each agent(defaults to 8)
+
+		rating: str, optional
+			"elo", "bradley-terry" or None to rank agents by wins
+			(defaults to "elo")
+		"""
+		super(SampledTournament, self).__init__()
+		self.rounds = 1
+		self.opponents = opponents
+		self.rating = _check_rating(rating)
 
-	return [i[0] for i in top]
-		
-def repop_from(parents):
+	def pairings(self, round, scores):
+		"""
+		returns the games of a round as pairs of population indices,
+		the first of each pair goes first
+
+		Parameters
+		----------
+		round: int
+			round of the season starting from 0
+
+		scores: list of numbers
+			the rating, or wins when unrated, of each agent so far
+		"""
+		pairings = []
+		others = len(scores) - 1
+		for first in range(len(scores)):
+			#indices past first are shifted up one to skip the agent itself
+			for second in sample(range(others), min(self.opponents, others)):
+				second += second >= first
+				pairings.append((first, second))
+				pairings.append((second, first))
+		return pairings
+
+class RacingTournament(object):
 	"""
-	refills the population to POP_SIZE from genetic algorithms performed on parents
+	Schedules rounds that eliminate the weakest agents until only
+	contenders for survival are left
 
+	Each round every contender plays opponents other contenders as 
+	first and as many as second, so contenders have always played the
+	same number of games. After each round all but the best keep 
+	fraction of contenders are eliminated and play no more games, 
+	never leaving fewer than survivors. The season ends once survivors
+	or fewer contenders are left, or after rounds rounds
 
-	Two parants are chosen at random to crossover and then the child is mutated
-	Parameters
+	With a confidence and no rating an agent is only eliminated when its
+	win rate is more than confidence / sqrt(games played) below the win
+	rate of the last agent that would survive, so close races are
+	played on until they are decided
+
+	Attributes
 	----------
-	parents : list of SimpleGenNeuralNet
-	the agents used to repopulate.
-	Should be length less than POP_SIZE
-	
+	rounds: int
+		most rounds in a season
+
+	opponents: int
+		opponents each contender plays as first in a round
+
+	keep: float
+		fraction of contenders kept after each round
+
+	confidence: float
+		margin in standard errors an agent must trail the last 
+		survivor by to be eliminated, 0 always eliminates
+
+	survivors: int
+		contenders left when the season ends
+
+	rating: str or None
+		"elo", "bradley-terry" or None to rank agents by wins
+
+	contenders: list of int
+		population indices of the agents still playing this season
 	"""
-	global population 
-	global standings
-	population = parents.copy()
-	standings = [[0,0] for i in range(1, POP_SIZE + 1)]
-	for x in range(len(parents), POP_SIZE):
-		parent_sample = sample(parents, 2)
-		population.append(SimpleGenNeuralNet.crossover(*parent_sample)\
-			.mutate(MUTATED_NODES))
\ No newline at end of file
+	def __init__(self, opponents=8, keep=0.5, confidence=0.0, survivors=SURVIVE_MAX,\
+		rounds=10, rating=None):
+		"""
+		Parameters
+		----------
+		opponents: int, optional
+			opponents each contender plays as first in a round
+			(defaults to 8)
+
+		keep: float, optional
+			fraction of contenders kept after each round(defaults to 0.5)
+
+		confidence: float, optional
+			margin in standard errors an agent must trail the last 
+			survivor by to be eliminated(defaults to 0.0)
+
+		survivors: int, optional
+			contenders left when the season ends
+			(defaults to SURVIVE_MAX)
+
+		rounds: int, optional
+			most rounds in a season(defaults to 10)
+
+		rating: str, optional
+			"elo", "bradley-terry" or None to rank agents by wins
+			(defaults to None)
+		"""
+		super(RacingTournament, self).__init__()
+		if not 0.0 < keep < 1.0:
+			raise Exception("keep must be between 0 and 1, {} was given".format(keep))
+		self.rounds = rounds
+		self.opponents = opponents
+		self.keep = keep
+		self.confidence = confidence
+		self.survivors = survivors
+		self.rating = _check_rating(rating)
+		self.contenders = []
+		self._games = 0
+
+	def pairings(self, round, scores):
+		"""
+		returns the games of a round as pairs of population indices,
+		the first of each pair goes first
+
+		Parameters
+		----------
+		round: int
+			round of the season starting from 0
+
+		scores: list of numbers
+			the rating, or wins when unrated, of each agent so far
+		"""
+		if round == 0:
+			self.contenders = list(range(len(scores)))
+			self._games = 0
+		elif len(self.contenders) <= self.survivors:
+			return []
+		else:
+			self._eliminate(scores)
+
+		#every contender plays the agents up to opponents places after 
+		#it in a random circle as first, and those before it as second
+		circle = list(self.contenders)
+		shuffle(circle)
+		opponents = min(self.opponents, len(circle) - 1)
+		self._games += 2 * opponents
+		return [(first, circle[(place + offset) % len(circle)])\
+			for offset in range(1, opponents + 1) for place, first in enumerate(circle)]
+
+	def _eliminate(self, scores):
+		ordered = sorted(self.contenders, key=lambda index: scores[index], reverse=True)
+		kept = max(self.survivors, int(math.ceil(self.keep * len(ordered))))
+		if self.confidence > 0 and self.rating is None and kept < len(ordered):
+			#agents close enough to the last survivor to overtake it stay
+			last = scores[ordered[self.survivors - 1]] / self._games
+			margin = self.confidence / math.sqrt(self._games)
+			while kept < len(ordered) and last - scores[ordered[kept]] / self._games <= margin:
+				kept += 1
+		self.contenders = sorted(ordered[:kept])
+
+def _check_rating(rating):
+	if rating not in RATINGS:
+		raise Exception("unknown rating {}, choose from {}".format(rating, RATINGS))
+	return rating
+
+TOURNAMENTS = {
+	"round-robin": RoundRobin,
+	"swiss": SwissTournament,
+	"sampled": SampledTournament,
+	"racing": RacingTournament
+}
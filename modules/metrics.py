@@ -0,0 +1,245 @@
+"""
+Instrumentation of the training loop
+
+Classes
+-------
+Metrics
+	times the phases of each generation and writes one json line per
+	generation
+
+WindowProfiler
+	profiles a window of generations with cProfile
+
+Functions
+---------
+peak_rss(): int
+	returns the highest resident set size this process has reached
+
+current_rss(): int or None
+	returns the resident set size of this process now
+"""
+
+import cProfile
+from contextlib import contextmanager
+import json
+import os
+import resource
+import sys
+import time
+from . import league
+
+def peak_rss():
+	"""
+	returns the highest resident set size this process has reached in
+	kilobytes, since it started rather than in any one generation
+
+	Returns
+	-------
+	int
+	"""
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	#macOS reports bytes, linux kilobytes
+	return peak // 1024 if sys.platform == "darwin" else peak
+
+def current_rss():
+	"""
+	returns the resident set size of this process now in kilobytes
+
+	Returns
+	-------
+	int or None
+		None where /proc/self/statm is not available
+	"""
+	try:
+		with open("/proc/self/statm") as f:
+			resident = int(f.read().split()[1])
+	except (OSError, IndexError, ValueError):
+		return None
+	return resident * os.sysconf("SC_PAGE_SIZE") // 1024
+
+class Metrics(object):
+	"""
+	Times the phases of each generation and writes one json line per
+	generation
+
+	Each line has the generation, the seconds spent in each phase, the
+	games, plies and forward passes from league.counters played during
+	the generation, the resident set size at the end of the generation
+	where it can be measured, and the highest resident set size the
+	process has reached since it started, both in kilobytes. Nothing is
+	written when no filename is given
+
+	Attributes
+	----------
+	seconds: dict of str to float
+		seconds spent in each phase of the current generation
+
+	Methods
+	-------
+	phase(name)
+		context manager that adds the time spent in it to a phase
+
+	write(generation, **extra): dict
+		writes the line of a generation and starts the next one
+
+	close()
+		closes the metrics file
+	"""
+	def __init__(self, filename=None):
+		"""
+		Parameters
+		----------
+		filename: str, optional
+			json lines file the metrics are appended to
+		"""
+		super(Metrics, self).__init__()
+		self._file = open(filename, "a") if filename != None else None
+		self._counters = dict(league.counters)
+		self.seconds = {}
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	@contextmanager
+	def phase(self, name):
+		"""
+		context manager that adds the time spent in it to a phase
+
+		Parameters
+		----------
+		name: str
+		"""
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+	def write(self, generation, **extra):
+		"""
+		writes the line of a generation and starts the next one
+
+		Parameters
+		----------
+		generation: int
+
+		extra - keyword:
+			other json serializable values to add to the line
+
+		Returns
+		-------
+		dict
+			the line that was written
+		"""
+		record = {"generation": generation, "time": time.time(), "seconds": self.seconds}
+		for key, value in league.counters.items():
+			record[key] = value - self._counters[key]
+		rss = current_rss()
+		if rss is not None:
+			record["rss_kb"] = rss
+		record["process_peak_rss_kb"] = peak_rss()
+		record.update(extra)
+
+		if self._file is not None:
+			self._file.write(json.dumps(record) + "\n")
+			self._file.flush()
+
+		self._counters = dict(league.counters)
+		self.seconds = {}
+		return record
+
+	def close(self):
+		"""
+		closes the metrics file
+		"""
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+
+class WindowProfiler(object):
+	"""
+	Profiles a window of generations with cProfile
+
+	Attributes
+	----------
+	first, last: int
+		first and last generation profiled
+
+	filename: str
+		file the pstats are dumped to after the last generation
+
+	Methods
+	-------
+	start(generation)
+		starts profiling if the generation is the first of the window
+
+	stop(generation)
+		stops profiling and dumps the stats if the generation is the
+		last of the window
+	"""
+	def __init__(self, first, last, filename):
+		"""
+		Parameters
+		----------
+		first, last: int
+			first and last generation profiled
+
+		filename: str
+			file the pstats are dumped to, can be read with pstats or
+			python -m pstats
+		"""
+		super(WindowProfiler, self).__init__()
+		if last < first:
+			raise Exception("the last generation profiled, {}, is before the first, {}".format(last, first))
+		self.first = first
+		self.last = last
+		self.filename = filename
+		self._profile = None
+
+	@classmethod
+	def from_window(cls, window, filename):
+		"""
+		creates a profiler from a window written as FIRST:LAST or as a
+		single generation
+
+		Parameters
+		----------
+		window: str
+
+		filename: str
+
+		Returns
+		-------
+		WindowProfiler
+		"""
+		first, separator, last = window.partition(":")
+		return cls(int(first), int(last if separator else first), filename)
+
+	def start(self, generation):
+		"""
+		starts profiling if the generation is the first of the window
+
+		Parameters
+		----------
+		generation: int
+		"""
+		if generation == self.first:
+			self._profile = cProfile.Profile()
+			self._profile.enable()
+
+	def stop(self, generation):
+		"""
+		stops profiling and dumps the stats if the generation is the
+		last of the window
+
+		Parameters
+		----------
+		generation: int
+		"""
+		if generation == self.last and self._profile is not None:
+			self._profile.disable()
+			self._profile.dump_stats(self.filename)
+			self._profile = None
@@ -0,0 +1,170 @@
+"""
+Plays league seasons across a pool of worker processes
+
+Each season the weights of the whole population are published once
+into a shared memory block. Worker processes map the block as a 
+StackedNetworks without copying it and play their share of the 
+season's games with league.play_batch, so only pairings and winners
+are sent between processes
+
+Classes
+-------
+SeasonPool
+	pool of worker processes that play the games of a season
+"""
+
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from . import league
+from .game_log import MAX_PLIES
+from .simple_gen_neural_net import StackedNetworks
+
+#shared memory block mapped by this worker process
+_attached = None
+
+def _attach(name, shapes, precision):
+	global _attached
+	if _attached is not None and _attached[0].name == name\
+		and _attached[1].precision == precision:
+		return _attached[1]
+
+	if _attached is not None:
+		#the mapped arrays must be released before the block is closed
+		block = _attached[0]
+		_attached = None
+		block.close()
+
+	block = shared_memory.SharedMemory(name=name)
+	try:
+		#the parent owns the block, stop this process's tracker from
+		#unlinking it when the worker exits
+		from multiprocessing import resource_tracker
+		resource_tracker.unregister(block._name, "shared_memory")
+	except Exception:
+		pass
+
+	layers = []
+	offset = 0
+	for shape in shapes:
+		layer = np.ndarray(shape, dtype=np.float64, buffer=block.buf, offset=offset)
+		layers.append(layer)
+		offset += layer.nbytes
+
+	_attached = (block, StackedNetworks.from_arrays(*layers, precision=precision))
+	return _attached[1]
+
+def _play(task):
+	name, shapes, precision, pairings, logged = task
+	before = dict(league.counters)
+	history = np.empty((len(pairings), MAX_PLIES), dtype=np.uint8) if logged else None
+	winners = league.play_batch(_attach(name, shapes, precision), pairings, history)
+	return winners, dict((key, league.counters[key] - before[key]) for key in before), history
+
+class SeasonPool(object):
+	"""
+	Pool of worker processes that play the games of a season
+
+	Can be used as a context manager, the workers are shut down when
+	the block exits
+
+	Attributes
+	----------
+	workers: int
+		number of worker processes
+
+	Methods
+	-------
+	play(agents, pairings, precision="float64", history=None): narray
+		plays every pairing across the workers
+
+	close()
+		shuts down the worker processes
+	"""
+	def __init__(self, workers):
+		"""
+		Parameters
+		----------
+		workers: int
+			number of worker processes to start
+		"""
+		super(SeasonPool, self).__init__()
+		if workers < 1:
+			raise Exception("a season pool needs at least one worker, {} were given".format(workers))
+		self.workers = workers
+		self._pool = multiprocessing.Pool(workers)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def close(self):
+		"""
+		shuts down the worker processes
+		"""
+		self._pool.close()
+		self._pool.join()
+
+	def play(self, agents, pairings, precision="float64", history=None):
+		"""
+		plays every pairing across the workers
+
+		the result is identical to league.play_batch(agents, pairings)
+		and the games played by the workers are added to 
+		league.counters
+
+		Parameters
+		----------
+		agents: list of SimpleGenNeuralNet
+			agents taking part, all with the same structure
+
+		pairings: list of tuples of two ints
+			indices in agents of the players of each game, the first
+			of each pair goes first
+
+		precision: str, optional
+			precision the workers choose moves at, the weights are 
+			shared at float64 and converted in each worker
+			(defaults to "float64")
+
+		history: narray, optional
+			(len(pairings), MAX_PLIES) uint8 the moves of each game are
+			written to, as by league.play_batch
+
+		Returns
+		-------
+		narray
+			winner of each game, 1 if the first agent of the pairing 
+			won the game, -1 for the second
+		"""
+		pairings = np.asarray(pairings, dtype=np.intp).reshape(-1, 2)
+		if not len(pairings):
+			return np.zeros(0, dtype=np.int8)
+
+		shapes = [(len(agents),) + np.shape(layer) for layer in agents[0].layer_weights]
+		size = sum(int(np.prod(shape)) for shape in shapes) * np.dtype(np.float64).itemsize
+		block = shared_memory.SharedMemory(create=True, size=size)
+		try:
+			offset = 0
+			for i, shape in enumerate(shapes):
+				layer = np.ndarray(shape, dtype=np.float64, buffer=block.buf, offset=offset)
+				np.stack([agent.layer_weights[i] for agent in agents], out=layer)
+				offset += layer.nbytes
+			del layer
+
+			#a few chunks per worker so uneven game lengths even out
+			chunks = np.array_split(pairings, min(len(pairings), self.workers * 4))
+			tasks = [(block.name, shapes, precision, chunk, history is not None) for chunk in chunks]
+			results = self._pool.map(_play, tasks)
+			#counts of the games played in the workers
+			for winners, counts, moves in results:
+				for key in counts:
+					league.counters[key] += counts[key]
+			if history is not None:
+				np.concatenate([moves for winners, counts, moves in results], out=history)
+			return np.concatenate([winners for winners, counts, moves in results])
+		finally:
+			block.close()
+			block.unlink()
@@ -0,0 +1,238 @@
+"""
+Asyncio server of trained agents' moves
+
+Concurrent requests are queued and answered together in micro-batches,
+each batch is one stacked forward pass. A batch is run as soon as it is
+full or when its oldest request has waited max_wait seconds
+
+Requests are HTTP with json bodies
+	POST /move {"board": 6 lists of 7 ints, "player": 1 or -1, "agent": int}
+		returns {"move": int}, agent is the rank of the agent to ask
+		and defaults to 0, the best agent
+	GET /stats
+		returns request and batch counters, throughput and latency 
+		percentiles in milliseconds
+
+Classes
+-------
+MoveServer
+	answers move requests in micro-batches
+"""
+
+import asyncio
+from collections import deque
+import json
+import time
+import numpy as np
+from .game import COLUMNS, ROWS
+
+def _is_int(value):
+	return isinstance(value, int) and not isinstance(value, bool)
+
+class MoveServer(object):
+	"""
+	Answers move requests in micro-batches
+
+	Attributes
+	----------
+	stack: StackedNetworks
+		the agents served, indexed by rank
+
+	max_batch: int
+		most requests answered by one forward pass
+
+	max_wait: float
+		most seconds a request waits for its batch to fill
+
+	requests, batches: int
+		requests answered and forward passes made
+
+	Methods
+	-------
+	best_move(board, player, agent=0): int
+		coroutine returning an agent's move for a board
+
+	stats(): dict
+		request and batch counters, throughput and latency percentiles
+
+	serve(host, port)
+		coroutine that serves HTTP requests until cancelled
+	"""
+	def __init__(self, stack, max_batch=256, max_wait=0.002, window=10000):
+		"""
+		Parameters
+		----------
+		stack: StackedNetworks
+			the agents served, indexed by rank
+
+		max_batch: int, optional
+			most requests answered by one forward pass(defaults to 256)
+
+		max_wait: float, optional
+			most seconds a request waits for its batch to fill
+			(defaults to 0.002)
+
+		window: int, optional
+			latencies of the most recent requests kept for percentiles
+			(defaults to 10000)
+		"""
+		super(MoveServer, self).__init__()
+		self.stack = stack
+		self.max_batch = max_batch
+		self.max_wait = max_wait
+		self.requests = 0
+		self.batches = 0
+		self._latencies = deque(maxlen=window)
+		self._started = time.perf_counter()
+		self._queue = None
+		self._batcher = None
+
+	async def best_move(self, board, player, agent=0):
+		"""
+		coroutine returning an agent's move for a board
+
+		Parameters
+		----------
+		board: list of lists of int
+			the board as in Game.board
+
+		player: int
+			the player to move, 1 for first, -1 for second
+
+		agent: int, optional
+			rank of the agent to ask(defaults to 0)
+
+		Returns
+		-------
+		int
+			the column the agent plays
+
+		Raises
+		------
+		Exception
+			If the board, player or agent is not valid
+		"""
+		#json booleans and fractional numbers compare equal to ints, so
+		#the types are checked as well as the values
+		inputs = np.asarray(board)
+		if inputs.shape != (ROWS, COLUMNS) or inputs.dtype.kind not in "iu"\
+			or not np.isin(inputs, (-1, 0, 1)).all():
+			raise Exception("board must be {} rows of {} slots holding -1, 0 or 1".format(ROWS, COLUMNS))
+		if not _is_int(player) or player not in (1, -1):
+			raise Exception("player must be 1 or -1, {} was given".format(player))
+		if not _is_int(agent) or not 0 <= agent < len(self.stack):
+			raise Exception("agent must be a rank from 0 to {}, {} was given".format(len(self.stack) - 1, agent))
+		inputs = inputs.astype(np.float64)
+
+		if self._batcher is None:
+			self._queue = asyncio.Queue()
+			self._batcher = asyncio.ensure_future(self._run_batches())
+
+		start = time.perf_counter()
+		future = asyncio.get_event_loop().create_future()
+		await self._queue.put((agent, inputs.ravel() * player, future))
+		move = await future
+		self._latencies.append(time.perf_counter() - start)
+		self.requests += 1
+		return move
+
+	async def _run_batches(self):
+		while True:
+			batch = [await self._queue.get()]
+			deadline = time.perf_counter() + self.max_wait
+			while len(batch) < self.max_batch:
+				timeout = deadline - time.perf_counter()
+				if timeout <= 0:
+					break
+				try:
+					batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+				except asyncio.TimeoutError:
+					break
+			#drain whatever else arrived without waiting any longer
+			while len(batch) < self.max_batch and not self._queue.empty():
+				batch.append(self._queue.get_nowait())
+
+			indices = np.array([request[0] for request in batch], dtype=np.intp)
+			moves = self.stack.choose(indices, np.stack([request[1] for request in batch]))
+			self.batches += 1
+			for (agent, inputs, future), move in zip(batch, moves):
+				if not future.done():
+					future.set_result(int(move))
+
+	def stats(self):
+		"""
+		request and batch counters, throughput and latency percentiles
+
+		Returns
+		-------
+		dict
+		"""
+		elapsed = time.perf_counter() - self._started
+		latencies = np.array(self._latencies) * 1000.0
+		return {
+			"requests": self.requests,
+			"batches": self.batches,
+			"mean_batch": self.requests / self.batches if self.batches else 0.0,
+			"requests_per_second": self.requests / elapsed if elapsed > 0 else 0.0,
+			"p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+			"p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None
+		}
+
+	async def _respond(self, writer, status, body):
+		encoded = json.dumps(body).encode("utf-8")
+		writer.write("HTTP/1.1 {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n"\
+			.format(status, len(encoded)).encode("latin-1") + encoded)
+		await writer.drain()
+
+	async def _handle(self, reader, writer):
+		try:
+			while True:
+				request_line = await reader.readline()
+				if not request_line:
+					break
+				method, path, version = request_line.decode("latin-1").split(" ", 2)
+				headers = {}
+				while True:
+					line = await reader.readline()
+					if line in (b"\r\n", b"\n", b""):
+						break
+					name, separator, value = line.decode("latin-1").partition(":")
+					headers[name.strip().lower()] = value.strip()
+				body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+				if method == "GET" and path == "/stats":
+					await self._respond(writer, "200 OK", self.stats())
+				elif method == "POST" and path == "/move":
+					try:
+						request = json.loads(body.decode("utf-8"))
+						move = await self.best_move(request["board"], request["player"],\
+							request.get("agent", 0))
+					except Exception as error:
+						await self._respond(writer, "400 Bad Request", {"error": str(error)})
+					else:
+						await self._respond(writer, "200 OK", {"move": move})
+				else:
+					await self._respond(writer, "404 Not Found", {"error": "unknown request"})
+
+				if headers.get("connection", "").lower() == "close" or version.strip() == "HTTP/1.0":
+					break
+		except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+			pass
+		finally:
+			writer.close()
+
+	async def serve(self, host="127.0.0.1", port=8080):
+		"""
+		coroutine that serves HTTP requests until cancelled
+
+		Parameters
+		----------
+		host: str, optional
+			(defaults to "127.0.0.1")
+
+		port: int, optional
+			(defaults to 8080)
+		"""
+		server = await asyncio.start_server(self._handle, host, port)
+		async with server:
+			await server.serve_forever()
@@ -1,5 +1,74 @@
+import hashlib
+import itertools
 import numpy as np
 
+#identifies every network created by this process
+_uids = itertools.count()
+
+#precisions inference can run at, the weights themselves stay float64
+PRECISIONS = ("float64", "float32", "int8")
+
+def _check_precision(precision):
+	if precision not in PRECISIONS:
+		raise Exception("unknown precision {}, choose from {}".format(precision, PRECISIONS))
+	return precision
+
+def _quantize(values):
+	#symmetric int8 quantization of each row along the last axis,
+	#returns the quantized values and the (..., 1) scale of each row
+	scales = np.abs(values).max(axis=-1, keepdims=True) / 127.0
+	scales[scales == 0] = 1.0
+	return np.rint(values / scales).astype(np.int8), scales.astype(np.float32)
+
+def _node_layout(num_nodes):
+	#first gene of every node, the number of genes it has and the node
+	#of every gene in a genome
+	starts = []
+	lengths = []
+	offset = 0
+	for inputs, size in zip(num_nodes, num_nodes[1:]):
+		starts.extend(range(offset, offset + size*(inputs + 1), inputs + 1))
+		lengths.extend([inputs + 1] * size)
+		offset += size*(inputs + 1)
+	return np.array(starts), np.array(lengths), np.repeat(np.arange(len(starts)), lengths)
+
+def breed_genomes(parents1, parents2, n, *num_nodes):
+	"""
+	Children created by crossover and mutation of n nodes
+
+	The operators of GenomeArena.breed on plain arrays of genomes, no
+	networks are created
+
+	Parameters
+	----------
+	parents1, parents2: narray
+		(children, genome length) genomes of the parents of each child
+
+	n: int
+		number of nodes to mutate on each child
+
+	num_nodes - variable: int
+		number of nodes at input and then every layer afterwards
+
+	Returns
+	-------
+	narray
+		(children, genome length) genomes of the children
+	"""
+	starts, lengths, node_of_gene = _node_layout(num_nodes)
+	from_1 = np.random.random_sample((len(parents1), len(starts))) > 0.5
+	children = np.where(from_1[:, node_of_gene], parents1, parents2)
+
+	nodes = np.random.randint(len(starts), size=(len(children), n))
+	offsets = np.arange(lengths.max())
+	genes = starts[nodes][:, :, None] + offsets
+	in_node = offsets < lengths[nodes][:, :, None]
+	change = np.random.random_sample(genes.shape)*2.0-1.0
+	rows = np.broadcast_to(np.arange(len(children))[:, None, None], genes.shape)
+	#add.at so a node picked twice is mutated twice
+	np.add.at(children, (rows[in_node], genes[in_node]), change[in_node])
+	return children
+
 class SimpleGenNeuralNet(object):
 	"""
 	A class to represent a simple feed forward neural netowrk that is 
@@ -14,6 +83,16 @@ class SimpleGenNeuralNet(object):
 		Each numpy array is a matrix representing the weigths and biases
 		of one layer
 
+	uid: int
+		identifies the network among all networks of this process
+
+	version: int
+		increased every time the weights are changed in place
+
+	precision: str
+		precision of inference, one of PRECISIONS. The weights are 
+		always kept in float64 for the genetic operators
+
 	Class Methods
 	-------------
 	from_random(*num_nodes): SimpleGenNeuralNet
@@ -25,7 +104,7 @@ class SimpleGenNeuralNet(object):
 	from_export(export): SimpleGenNeuralNet
 		Creates a new neural network from an export
 
-	crossover(parent1, parent2): SimpleGenNeuralNet
+	crossover(parent1, parent2, out=None): SimpleGenNeuralNet
 		Creates a child neural network from two parents using
 		node wise crossover
 
@@ -34,9 +113,27 @@ class SimpleGenNeuralNet(object):
 	export(): list
 		Exports the neural network as a list for serialization
 
+	structure(): tuple of int
+		Number of nodes at input and then every layer afterwards
+
+	content_hash(): bytes
+		Hash of the network's structure and weights
+
+	changed()
+		Marks the weights as changed in place
+
+	use_precision(precision)
+		Selects the precision of inference
+
+	compile(): InferencePlan
+		Returns the network's allocation free inference plan
+
 	feed_forward(): narray
 		Calculates output of the neural network
 
+	choose(x, sign=1): int
+		Index of the most confident output node
+
 	mutate(n)
 		Mutates n number of nodes
 
@@ -86,6 +183,12 @@ class SimpleGenNeuralNet(object):
 		if len(self.layer_weights) < 2:
 			raise Exception('SimpleGenNeuralNet must recieve at least 2 arguments (layers). only {} was given'.format(self.layer_weights.size))
 
+		self.uid = next(_uids)
+		self.version = 0
+		self.precision = "float64"
+		self._plan = None
+		self._plan_version = 0
+
 	def __repr__(self):
 		output = "Neural Net {"
 		for layer in self.layer_weights:
@@ -193,6 +296,81 @@ class SimpleGenNeuralNet(object):
 		denominator = np.sum(vector)
 		return vector/denominator
 
+	def structure(self):
+		"""
+		Number of nodes at input and then every layer afterwards
+
+		Returns
+		-------
+		tuple of int
+			the arguments from_random would need to create a network
+			with this structure
+		"""
+		return (np.size(self.layer_weights[0], 1) - 1,) +\
+			tuple(np.size(layer, 0) for layer in self.layer_weights)
+
+	def content_hash(self):
+		"""
+		Hash of the network's structure and weights
+
+		Networks with equal hashes choose the same moves. The hash is 
+		computed on every call because the weights can be changed in
+		place, through mutate or a GenomeArena
+
+		Returns
+		-------
+		bytes
+			16 byte blake2b digest
+		"""
+		digest = hashlib.blake2b(digest_size=16)
+		for layer in self.layer_weights:
+			digest.update(np.array(np.shape(layer)).tobytes())
+			digest.update(np.ascontiguousarray(layer))
+		return digest.digest()
+
+	def changed(self):
+		"""
+		Marks the weights as changed in place
+
+		mutate, crossover and GenomeArena call this for the networks 
+		they change, anything else writing to layer_weights should 
+		call it so results remembered for the old weights are dropped
+		"""
+		self.version += 1
+
+	def use_precision(self, precision):
+		"""
+		Selects the precision of inference
+
+		Parameters
+		----------
+		precision: str
+			one of PRECISIONS, "float64" infers from the weights
+			themselves, "float32" and "int8" from a converted copy
+		"""
+		if _check_precision(precision) != self.precision:
+			self.precision = precision
+			self._plan = None
+
+	def compile(self):
+		"""
+		Returns the network's inference plan
+
+		The plan is built on the first call and reused afterwards. A
+		float64 plan reads the weights through views so it stays valid
+		when the network is mutated in place, plans at lower precision
+		hold a converted copy and are rebuilt after the weights change
+
+		Returns
+		-------
+		InferencePlan
+		"""
+		if self._plan is None or (self.precision != "float64"\
+			and self._plan_version != self.version):
+			self._plan = InferencePlan(self.layer_weights, self.precision)
+			self._plan_version = self.version
+		return self._plan
+
 	def feed_forward(self, x):
 		"""
 		Calculates output of the neural network
@@ -222,13 +400,29 @@ class SimpleGenNeuralNet(object):
 		if len(x) + 1 != first[0,:].size:
 			raise Exception("input is not the required number of nodes, {} is required and {} were given".format(first[0,:].size - 1, len(x)))
 
-		product = np.array(x).reshape(len(x),1)
-		for layer_weight in self.layer_weights:
-			product = np.append(product, [[1]], axis=0)
-			product = layer_weight @ product
-			product = self.relu(product)
+		product = self.compile().forward(x)
+		return self.softmax(product.reshape(len(product),1).astype(np.float64))
 
-		return self.softmax(product)
+	def choose(self, x, sign=1):
+		"""
+		Index of the most confident output node
+
+		Same as the argmax of feed_forward without normalizing the 
+		output, no arrays are allocated when x is an narray
+
+		Parameters
+		----------
+		x: narray
+			Input nodes, any shape with the right number of elements
+
+		sign: int, optional
+			every input node is multiplied by sign(defaults to 1)
+
+		Returns
+		-------
+		int
+		"""
+		return self.compile().choose(x, sign)
 
 	def mutate(self, n):
 		"""
@@ -259,10 +453,11 @@ class SimpleGenNeuralNet(object):
 				else:
 					overall_index -= np.size(layer,0)
 
+		self.changed()
 		return self
 
 	@classmethod
-	def crossover(cls, parent1, parent2):
+	def crossover(cls, parent1, parent2, out=None):
 		"""
 		Creates a child neural network from two parents using
 		node wise crossover
@@ -275,6 +470,12 @@ class SimpleGenNeuralNet(object):
 		parent1, parent2: SimpleGenNeuralNet
 			Parent neural networks used to create child
 
+		out: SimpleGenNeuralNet, optional
+			network with the same structure as the parents that the 
+			child is written into, such as a row of a GenomeArena.
+			It must not be one of the parents.
+			A new network is created if not given
+
 		Returns
 		-------
 		SimpleGenNeuralNet
@@ -283,17 +484,544 @@ class SimpleGenNeuralNet(object):
 		if len(parent1.layer_weights) != len(parent2.layer_weights):
 			raise Exception("Parent networks must have the same structure. Parent one has {} layers. Parent two has {} layers".format(len(parent1.layer_weights), len(parent2.layer_weights)))
 		
-		child = []
 		for layer1, layer2 in zip(parent1.layer_weights, parent2.layer_weights):
 			if np.shape(layer1) != np.shape(layer2):
 				raise Exception("Both Parents must have exactly the same sturcture. Parent one has a layer with shape {}, the corresponding layer on the second parent has shape{}".format(np.shape(layer1), np.shape(layer2)))
 
-			child_layer = []
-			for row_from_1, row_from_2 in zip(list(layer1), list(layer2)):
-				if np.random.random_sample() > 0.5:
-					child_layer.append(row_from_1)
-				else:
-					child_layer.append(row_from_2)
+		if out is None:
+			out = cls(*[np.empty_like(layer) for layer in parent1.layer_weights])
+		elif out.structure() != parent1.structure():
+			raise Exception("The child network must have the same structure as the parents. The parents have structure {}, the child has {}".format(parent1.structure(), out.structure()))
 
-			child.append(np.vstack(child_layer))
-		return cls(*child)
\ No newline at end of file
+		for layer1, layer2, child_layer in zip(parent1.layer_weights, parent2.layer_weights, out.layer_weights):
+			from_1 = np.random.random_sample(len(layer1)) > 0.5
+			np.copyto(child_layer, layer2)
+			np.copyto(child_layer, layer1, where=from_1[:, None])
+
+		out.changed()
+		return out
+
+
+class GenomeArena(object):
+	"""
+	The genomes of a population of neural networks with one structure
+	stored in a single contiguous array
+
+	Each row of genomes holds the layer matrices of one network one
+	after another. The networks handed out by the arena are views of 
+	their row, so changes made through either are seen by both, and
+	crossover and mutation of many children are done with a few 
+	array operations over the whole arena
+
+	Attributes
+	----------
+	num_nodes: tuple of int
+		number of nodes at input and then every layer afterwards of
+		the stored networks
+
+	genomes: narray
+		(P, genome length) weights and biases of every network
+
+	layers: list of numpy arrays
+		(P, rows, columns) view of each layer of every network
+
+	networks: list of SimpleGenNeuralNet
+		the network viewing each row of genomes
+
+	Methods
+	-------
+	index(network): int
+		Row of genomes a network views
+
+	stack(precision="float64"): StackedNetworks
+		All networks of the arena stacked, without copying at float64
+
+	randomize(rows)
+		Fills rows with random weights and biases
+
+	breed(parents1, parents2, children, n)
+		Writes children created by crossover and mutation of n nodes
+	"""
+	def __init__(self, *num_nodes, size=0, genomes=None):
+		"""
+		Parameters
+		----------
+		num_nodes - variable: int
+			number of nodes at input and then every layer afterwards
+
+		size: int, optional
+			number of networks the arena holds, their weights are 
+			undefined(defaults to 0)
+
+		genomes: narray, optional
+			(P, genome length) existing genomes to use as the arena's
+			storage without copying them, size is ignored if given
+
+		Raises
+		------
+		Exception
+			If genomes does not have the genome length of num_nodes
+		"""
+		super(GenomeArena, self).__init__()
+		self.num_nodes = tuple(num_nodes)
+		shapes = [(size, inputs + 1) for inputs, size in zip(num_nodes, num_nodes[1:])]
+		length = sum(rows * columns for rows, columns in shapes)
+		if genomes is None:
+			genomes = np.empty((size, length))
+		elif np.ndim(genomes) != 2 or np.size(genomes, 1) != length:
+			raise Exception("genomes of networks with structure {} have length {}, an array of shape {} was given".format(self.num_nodes, length, np.shape(genomes)))
+		self.genomes = genomes
+
+		self.layers = []
+		offset = 0
+		for rows, columns in shapes:
+			self.layers.append(genomes[:, offset:offset + rows*columns]\
+				.reshape(len(genomes), rows, columns))
+			offset += rows*columns
+
+		self.networks = [SimpleGenNeuralNet(*[layer[row] for layer in self.layers])\
+			for row in range(len(genomes))]
+		self._rows = dict((id(network), row) for row, network in enumerate(self.networks))
+
+	def __len__(self):
+		return len(self.genomes)
+
+	def __contains__(self, network):
+		return id(network) in self._rows
+
+	def index(self, network):
+		"""
+		Row of genomes a network views
+
+		Parameters
+		----------
+		network: SimpleGenNeuralNet
+			one of the arena's networks
+
+		Returns
+		-------
+		int
+
+		Raises
+		------
+		Exception
+			If the network is not one of the arena's
+		"""
+		if id(network) not in self._rows:
+			raise Exception("network is not stored in this genome arena")
+		return self._rows[id(network)]
+
+	def stack(self, precision="float64"):
+		"""
+		All networks of the arena stacked, without copying at float64
+
+		Parameters
+		----------
+		precision: str, optional
+			precision of inference, one of PRECISIONS
+			(defaults to "float64")
+
+		Returns
+		-------
+		StackedNetworks
+			indexed by row of genomes
+		"""
+		return StackedNetworks.from_arrays(*self.layers, precision=precision)
+
+	def randomize(self, rows):
+		"""
+		Fills rows with random weights and biases
+
+		All random values are in the interval [0.0, 1.0)
+
+		Parameters
+		----------
+		rows: list of int
+			rows of genomes to fill
+		"""
+		rows = np.asarray(rows, dtype=np.intp)
+		self.genomes[rows] = np.random.random_sample((len(rows), np.size(self.genomes, 1)))
+		for row in rows:
+			self.networks[row].changed()
+
+	def breed(self, parents1, parents2, children, n):
+		"""
+		Writes children created by crossover and mutation of n nodes
+
+		Each node of a child is taken from the corresponding node of 
+		one of its two parents at random, then n nodes picked at random
+		are mutated by adding random numbers from the interval
+		[-1.0, 1.0) to them, the same operators as 
+		SimpleGenNeuralNet.crossover and SimpleGenNeuralNet.mutate
+
+		Parameters
+		----------
+		parents1, parents2: list of int
+			rows of the parents of each child
+
+		children: list of int
+			rows the children are written to, these must not be rows
+			of any of the parents
+
+		n: int
+			number of nodes to mutate on each child
+		"""
+		parents1 = np.asarray(parents1, dtype=np.intp)
+		parents2 = np.asarray(parents2, dtype=np.intp)
+		children = np.asarray(children, dtype=np.intp)
+
+		self.genomes[children] = breed_genomes(self.genomes[parents1], self.genomes[parents2],\
+			n, *self.num_nodes)
+		for row in children:
+			self.networks[row].changed()
+
+
+class InferencePlan(object):
+	"""
+	A compiled forward pass of a SimpleGenNeuralNet that does not
+	allocate once built
+
+	The weights and biases of each layer are read through separate 
+	views of the network's layer matrices, so no bias node has to be
+	appended to the activations, and each layer writes into a scratch
+	buffer that is reused between calls
+
+	At float32 the plan holds float32 copies of the weights and biases.
+	At int8 it holds weights quantized per node with a float32 scale
+	for each node, activations are quantized on every layer and 
+	multiplied with the weights in int32
+
+	Attributes
+	----------
+	precision: str
+		one of PRECISIONS
+
+	weights: list of numpy arrays
+		weight matrix of each layer, a view without the bias column at
+		float64
+
+	biases: list of numpy arrays
+		bias vector of each layer, a view of the bias column at float64
+
+	scales: list of numpy arrays
+		(rows, 1) scale of each node's int8 weights, empty unless the
+		precision is int8
+
+	Methods
+	-------
+	forward(x, sign=1): narray
+		Calculates the output nodes before softmax
+
+	choose(x, sign=1): int
+		Index of the most confident output node
+	"""
+	def __init__(self, layer_weights, precision="float64"):
+		"""
+		Parameters
+		----------
+		layer_weights: list of numpy arrays
+			the layer matrices of a SimpleGenNeuralNet
+
+		precision: str, optional
+			one of PRECISIONS(defaults to "float64")
+		"""
+		super(InferencePlan, self).__init__()
+		self.precision = _check_precision(precision)
+		self.weights = [layer[:, :-1] for layer in layer_weights]
+		self.biases = [layer[:, -1] for layer in layer_weights]
+		self.scales = []
+		dtype = np.float64
+		if precision == "float32":
+			dtype = np.float32
+			self.weights = [weight.astype(dtype) for weight in self.weights]
+		elif precision == "int8":
+			dtype = np.float32
+			self.weights, self.scales = map(list, zip(*[_quantize(weight)\
+				for weight in self.weights]))
+			self.scales = [scale[:, 0] for scale in self.scales]
+		self.biases = [bias.astype(dtype, copy=False) for bias in self.biases]
+		self._input = np.empty(self.weights[0].shape[1], dtype=dtype)
+		self._buffers = [np.empty(len(layer), dtype=dtype) for layer in layer_weights]
+
+	def forward(self, x, sign=1):
+		"""
+		Calculates the output nodes before softmax
+
+		Parameters
+		----------
+		x: narray
+			Input nodes, any shape with the right number of elements
+
+		sign: int, optional
+			every input node is multiplied by sign(defaults to 1)
+
+		Returns
+		-------
+		narray
+			Output nodes, the array is overwritten by the next call
+		"""
+		np.multiply(np.reshape(x, -1), sign, out=self._input, casting="unsafe")
+		product = self._input
+		if self.precision == "int8":
+			for weight, scale, bias, buffer in zip(self.weights, self.scales,\
+				self.biases, self._buffers):
+				quantized, input_scale = _quantize(product)
+				np.multiply(np.matmul(weight, quantized, dtype=np.int32), scale, out=buffer,\
+					casting="unsafe")
+				np.multiply(buffer, input_scale, out=buffer)
+				np.add(buffer, bias, out=buffer)
+				np.maximum(buffer, 0, out=buffer)
+				product = buffer
+			return product
+
+		for weight, bias, buffer in zip(self.weights, self.biases, self._buffers):
+			np.dot(weight, product, out=buffer)
+			np.add(buffer, bias, out=buffer)
+			np.maximum(buffer, 0, out=buffer)
+			product = buffer
+
+		return product
+
+	def choose(self, x, sign=1):
+		"""
+		Index of the most confident output node
+
+		The exponent of softmax is kept so outputs that overflow are
+		picked the same way as from feed_forward, the normalization
+		does not change the order and is skipped
+
+		Parameters
+		----------
+		x: narray
+			Input nodes, any shape with the right number of elements
+
+		sign: int, optional
+			every input node is multiplied by sign(defaults to 1)
+
+		Returns
+		-------
+		int
+		"""
+		product = self.forward(x, sign)
+		if self.precision != "float64":
+			#overflow at the same outputs as float64
+			product = product.astype(np.float64)
+		np.exp(product, out=product)
+		return int(np.argmax(product))
+
+
+class StackedNetworks(object):
+	"""
+	The weights of many neural networks with the same structure
+	stacked together so they can be evaluated in one batched call
+
+	Attributes
+	----------
+	layer_weights: list of numpy arrays
+		Each numpy array has shape (P, rows, columns) and holds the 
+		weights and biases of one layer of all P networks
+
+	precision: str
+		precision of inference, one of PRECISIONS
+
+	weights, biases: list of numpy arrays
+		views of layer_weights without the bias column and of only the
+		bias column at float64, converted copies of them otherwise.
+		int8 weights are quantized per node
+
+	scales: list of numpy arrays
+		(P, rows, 1) scale of each node's int8 weights, empty unless 
+		the precision is int8
+
+	Class Methods
+	-------------
+	from_arrays(*layer_weights, precision="float64"): StackedNetworks
+		Wraps already stacked layer arrays without copying them
+
+	from_genomes(genomes, *num_nodes, precision="float64"): StackedNetworks
+		Wraps rows of genomes laid out as in a GenomeArena without 
+		copying them
+
+	Methods
+	-------
+	forward(indices, x): narray
+		Calculates output of the chosen networks on a batch of inputs
+		before softmax
+
+	choose(indices, x): narray
+		Index of the most confident output node for each input
+	"""
+	def __init__(self, networks, precision="float64"):
+		"""
+		Parameters
+		----------
+		networks: list of SimpleGenNeuralNet
+			networks to stack, in the order they will be indexed
+
+		precision: str, optional
+			precision of inference, one of PRECISIONS
+			(defaults to "float64")
+
+		Raises
+		------
+		Exception
+			If the networks do not all have the same structure
+		"""
+		super(StackedNetworks, self).__init__()
+		shapes = [np.shape(layer) for layer in networks[0].layer_weights]
+		for network in networks:
+			if [np.shape(layer) for layer in network.layer_weights] != shapes:
+				raise Exception("Stacked networks must have exactly the same structure. Expected layers with shapes {}, got {}".format(shapes, [np.shape(layer) for layer in network.layer_weights]))
+
+		self._set_layers([np.stack([network.layer_weights[i] for network in networks])\
+			for i in range(len(shapes))], precision)
+
+	@classmethod
+	def from_arrays(cls, *layer_weights, precision="float64"):
+		"""
+		Wraps already stacked layer arrays without copying them
+
+		Parameters
+		----------
+		layer_weights - variable: narray
+			(P, rows, columns) weights and biases of one layer of 
+			every network
+
+		precision: str, optional
+			precision of inference, one of PRECISIONS, only float64
+			infers without copying(defaults to "float64")
+
+		Returns
+		-------
+		StackedNetworks
+		"""
+		stacked = cls.__new__(cls)
+		stacked._set_layers(list(layer_weights), precision)
+		return stacked
+
+	@classmethod
+	def from_genomes(cls, genomes, *num_nodes, precision="float64"):
+		"""
+		Wraps rows of genomes laid out as in a GenomeArena without 
+		copying them
+
+		Parameters
+		----------
+		genomes: narray
+			(P, genome length) weights and biases of every network
+
+		num_nodes - variable: int
+			number of nodes at input and then every layer afterwards
+
+		precision: str, optional
+			precision of inference, one of PRECISIONS, only float64
+			infers without copying(defaults to "float64")
+
+		Returns
+		-------
+		StackedNetworks
+		"""
+		layers = []
+		offset = 0
+		for inputs, size in zip(num_nodes, num_nodes[1:]):
+			length = size * (inputs + 1)
+			layers.append(genomes[:, offset:offset + length].reshape(len(genomes), size, inputs + 1))
+			offset += length
+		return cls.from_arrays(*layers, precision=precision)
+
+	def _set_layers(self, layer_weights, precision):
+		self.precision = _check_precision(precision)
+		self.layer_weights = layer_weights
+		self.weights = [layer[:, :, :-1] for layer in layer_weights]
+		self.biases = [layer[:, :, -1] for layer in layer_weights]
+		self.scales = []
+		if precision == "float32":
+			self.weights = [weight.astype(np.float32) for weight in self.weights]
+		elif precision == "int8":
+			self.weights, self.scales = map(list, zip(*[_quantize(weight)\
+				for weight in self.weights]))
+		if precision != "float64":
+			self.biases = [bias.astype(np.float32) for bias in self.biases]
+
+	def __len__(self):
+		return len(self.layer_weights[0])
+
+	def forward(self, indices, x):
+		"""
+		Calculates output of the chosen networks on a batch of inputs
+
+		Row i of the result is equal to 
+		networks[indices[i]].compile().forward(x[i]) 
+
+		Parameters
+		----------
+		indices: narray
+			(B,) index of the network evaluating each input
+
+		x: narray
+			(B, input nodes) inputs
+
+		Returns
+		-------
+		narray
+			(B, output nodes) output nodes before softmax
+		"""
+		x = np.asarray(x)
+		first = self.layer_weights[0]
+		if x.shape[1] + 1 != first.shape[2]:
+			raise Exception("input is not the required number of nodes, {} is required and {} were given".format(first.shape[2] - 1, x.shape[1]))
+
+		#the boards of each network are multiplied by its weights in one
+		#matmul, rather than copying a network's weights for every board
+		indices = np.asarray(indices)
+		order = np.argsort(indices, kind="stable")
+		networks, starts = np.unique(indices[order], return_index=True)
+		groups = list(zip(networks.tolist(), np.split(order, starts[1:])))
+
+		if self.precision == "int8":
+			product = x
+			for weight, scale, bias in zip(self.weights, self.scales, self.biases):
+				quantized, input_scale = _quantize(product)
+				product = np.empty((len(x), weight.shape[1]), dtype=np.int32)
+				for network, rows in groups:
+					product[rows] = np.matmul(quantized[rows], weight[network].T, dtype=np.int32)
+				product = np.multiply(product, scale[indices][:, :, 0] * input_scale,\
+					dtype=np.float32)
+				product += bias[indices]
+				SimpleGenNeuralNet.relu(product)
+			return product
+
+		product = x if self.precision == "float64" else x.astype(np.float32)
+		for weight, bias in zip(self.weights, self.biases):
+			layer = np.empty((len(x), weight.shape[1]), dtype=weight.dtype)
+			for network, rows in groups:
+				layer[rows] = product[rows] @ weight[network].T
+			product = layer
+			product += bias[indices]
+			SimpleGenNeuralNet.relu(product)
+
+		return product
+
+	def choose(self, indices, x):
+		"""
+		Index of the most confident output node for each input
+
+		Parameters
+		----------
+		indices: narray
+			(B,) index of the network evaluating each input
+
+		x: narray
+			(B, input nodes) inputs
+
+		Returns
+		-------
+		narray
+			(B,) argmax of each network's output
+		"""
+		product = self.forward(indices, x)
+		if self.precision != "float64":
+			#overflow at the same outputs as float64
+			product = product.astype(np.float64)
+		np.exp(product, out=product)
+		return np.argmax(product, axis=1)
@@ -0,0 +1,331 @@
+"""
+Connect four solver used as a fixed strength opponent
+
+Positions are searched with negamax and alpha-beta pruning over the 
+same bitboard layout as game.Game, with a transposition table, moves 
+ordered by the threats they make and iterative deepening so a search
+can be stopped by a node or time budget. Without a depth limit the 
+search plays perfectly, given enough budget
+
+Scores are from the view of the player to move, a win with k of that
+player's pieces left to play scores k + 1, a loss the negative, and a
+draw or a position past the depth limit scores 0
+
+Classes
+-------
+Solver
+	chooses moves by searching the game tree
+
+Functions
+---------
+play_game(agent, solver, agent_first=True): int
+	plays a game between an agent and a solver
+
+evaluate(agents, solver): dict
+	plays each agent against a solver as both players
+"""
+
+import time
+from .game import COLUMNS, ROWS, Game
+from . import league
+
+HEIGHT = ROWS + 1 #bits per column
+SIZE = ROWS * COLUMNS
+BOTTOM = sum(1 << column * HEIGHT for column in range(COLUMNS))
+BOARD = BOTTOM * ((1 << ROWS) - 1)
+#centre columns first, they take part in the most lines
+ORDER = sorted(range(COLUMNS), key=lambda column: abs(column - COLUMNS // 2))
+
+def _column_mask(column):
+	return ((1 << ROWS) - 1) << column * HEIGHT
+
+def _winning_slots(position, mask):
+	#empty slots that would complete four in a row for position
+	slots = (position << 1) & (position << 2) & (position << 3)
+	for shift in (HEIGHT, HEIGHT - 1, HEIGHT + 1):
+		pair = (position << shift) & (position << 2 * shift)
+		slots |= pair & (position << 3 * shift)
+		slots |= pair & (position >> shift)
+		pair = (position >> shift) & (position >> 2 * shift)
+		slots |= pair & (position << shift)
+		slots |= pair & (position >> 3 * shift)
+	return slots & (BOARD ^ mask)
+
+def _possible(mask):
+	return (mask + BOTTOM) & BOARD
+
+class _OutOfBudget(Exception):
+	pass
+
+class Solver(object):
+	"""
+	Chooses moves by searching the game tree
+
+	Attributes
+	----------
+	depth: int or None
+		plies searched ahead, None searches to the end of the game
+
+	max_nodes: int or None
+		nodes searched for each move before the deepest finished
+		search is used
+
+	max_seconds: float or None
+		seconds searched for each move before the deepest finished
+		search is used
+
+	nodes: int
+		nodes searched since the counters were last reset
+
+	seconds: float
+		seconds spent searching since the counters were last reset
+
+	Methods
+	-------
+	choose(board, player): int
+		returns the solver's move given the board
+
+	nodes_per_second(): float
+		search speed since the counters were last reset
+
+	reset_counts()
+		zeroes the node and time counters
+	"""
+	def __init__(self, depth=None, max_nodes=None, max_seconds=None, table_size=1 << 20):
+		"""
+		Parameters
+		----------
+		depth: int, optional
+			plies searched ahead(defaults to None, the end of the game)
+
+		max_nodes: int, optional
+			node budget of each move(defaults to None, no budget)
+
+		max_seconds: float, optional
+			time budget of each move(defaults to None, no budget)
+
+		table_size: int, optional
+			positions held by the transposition table before it is 
+			cleared(defaults to 2**20)
+		"""
+		super(Solver, self).__init__()
+		self.depth = depth
+		self.max_nodes = max_nodes
+		self.max_seconds = max_seconds
+		self.table_size = table_size
+		#position key to upper bound of its score and the depth searched
+		self._table = {}
+		self.nodes = 0
+		self.seconds = 0.0
+
+	def reset_counts(self):
+		"""
+		zeroes the node and time counters
+		"""
+		self.nodes = 0
+		self.seconds = 0.0
+
+	def nodes_per_second(self):
+		"""
+		search speed since the counters were last reset
+
+		Returns
+		-------
+		float
+		"""
+		return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+	def choose(self, board, player):
+		"""
+		returns the solver's move given the board
+
+		Parameters
+		----------
+		board: list of lists of int
+			the board as in Game.board
+
+		player: int
+			the player to move, 1 for first, -1 for second
+
+		Returns
+		-------
+		int
+			the column played
+		"""
+		position = mask = 0
+		for row in range(ROWS):
+			for column in range(COLUMNS):
+				if board[row][column]:
+					bit = 1 << column * HEIGHT + ROWS - 1 - row
+					mask |= bit
+					if board[row][column] == player:
+						position |= bit
+
+		start = time.perf_counter()
+		nodes = self.nodes
+		try:
+			return self._search(position, mask, start, nodes)
+		finally:
+			self.seconds += time.perf_counter() - start
+
+	def _search(self, position, mask, start, nodes):
+		moves = bin(mask).count("1")
+		possible = _possible(mask)
+		legal = [column for column in ORDER if possible & _column_mask(column)]
+		winning = _winning_slots(position, mask) & possible
+		for column in legal:
+			if winning & _column_mask(column):
+				return column
+		candidates = self._ordered(position, mask, self._non_losing(position, mask))
+		if not candidates:
+			return legal[0]
+		if len(candidates) == 1:
+			return candidates[0][1]
+
+		self._deadline = start + self.max_seconds if self.max_seconds else None
+		self._node_limit = nodes + self.max_nodes if self.max_nodes else None
+		remaining = SIZE - moves
+		limit = remaining if self.depth is None else min(self.depth, remaining)
+		best = candidates[0][1]
+		for depth in range(1, limit + 1):
+			try:
+				best = self._root(position, mask, moves, candidates, depth)
+			except _OutOfBudget:
+				break
+		return best
+
+	def _root(self, position, mask, moves, candidates, depth):
+		alpha, beta = -SIZE, SIZE
+		best = candidates[0][1]
+		for move, column in candidates:
+			score = -self._negamax(position ^ mask, mask | move, moves + 1, -beta, -alpha, depth - 1)
+			if score > alpha:
+				alpha, best = score, column
+		return best
+
+	def _non_losing(self, position, mask):
+		#moves that neither leave the opponent an immediate win nor
+		#fail to block one
+		possible = _possible(mask)
+		threats = _winning_slots(position ^ mask, mask)
+		forced = possible & threats
+		if forced:
+			if forced & (forced - 1):
+				return 0
+			possible = forced
+		return possible & ~(threats >> 1)
+
+	def _ordered(self, position, mask, possible):
+		moves = []
+		for column in ORDER:
+			move = possible & _column_mask(column)
+			if move:
+				threats = bin(_winning_slots(position | move, mask)).count("1")
+				moves.append((threats, move, column))
+		moves.sort(key=lambda item: -item[0])
+		return [(move, column) for threats, move, column in moves]
+
+	def _negamax(self, position, mask, moves, alpha, beta, depth):
+		#the player to move can not win immediately, every move checked 
+		#by _non_losing keeps it that way
+		self.nodes += 1
+		if self._node_limit is not None and self.nodes >= self._node_limit:
+			raise _OutOfBudget()
+		if self._deadline is not None and not self.nodes & 1023\
+			and time.perf_counter() >= self._deadline:
+			raise _OutOfBudget()
+
+		#bounds are halved before they are negated, as flooring a
+		#negative odd count would be one past the score a win returns
+		possible = self._non_losing(position, mask)
+		if not possible:
+			return -((SIZE - moves) // 2)
+		if moves >= SIZE - 2:
+			return 0
+		lowest = -((SIZE - 2 - moves) // 2)
+		if alpha < lowest:
+			alpha = lowest
+			if alpha >= beta:
+				return alpha
+		highest = (SIZE - 1 - moves) // 2
+		key = position + mask
+		entry = self._table.get(key)
+		if entry is not None and entry[1] >= depth and entry[0] < highest:
+			highest = entry[0]
+		if beta > highest:
+			beta = highest
+			if alpha >= beta:
+				return beta
+		if depth == 0:
+			return min(max(0, alpha), beta)
+
+		for move, column in self._ordered(position, mask, possible):
+			score = -self._negamax(position ^ mask, mask | move, moves + 1, -beta, -alpha, depth - 1)
+			if score >= beta:
+				return score
+			if score > alpha:
+				alpha = score
+
+		if len(self._table) >= self.table_size:
+			self._table.clear()
+		self._table[key] = (alpha, depth)
+		return alpha
+
+def play_game(agent, solver, agent_first=True):
+	"""
+	plays a game between an agent and a solver
+
+	Parameters
+	----------
+	agent: SimpleGenNeuralNet
+
+	solver: Solver
+
+	agent_first: boolean, optional
+		whether the agent moves first(defaults to True)
+
+	Returns
+	-------
+	int
+		1 if the agent won, -1 if the solver won and 0 for a draw
+	"""
+	game = Game()
+	players = {1: agent, -1: solver} if agent_first else {1: solver, -1: agent}
+	for ply in range(SIZE):
+		player = players[game.current_player]
+		if player is agent:
+			move = league.choose_move(agent, game.inputs, game.current_player)
+		else:
+			move = solver.choose(game.board, game.current_player)
+		if not game.can_place(move):
+			#a move into a full column forfeits the game
+			return -1 if player is agent else 1
+		if game.check_win_with(move):
+			return 1 if player is agent else -1
+	return 0
+
+def evaluate(agents, solver):
+	"""
+	plays each agent against a solver as both players
+
+	Parameters
+	----------
+	agents: list of SimpleGenNeuralNet
+
+	solver: Solver
+
+	Returns
+	-------
+	dict
+		wins, draws and losses of the agents, the nodes the solver
+		searched and its nodes per second
+	"""
+	solver.reset_counts()
+	results = {"wins": 0, "draws": 0, "losses": 0}
+	for agent in agents:
+		for agent_first in (True, False):
+			result = play_game(agent, solver, agent_first)
+			results[{1: "wins", 0: "draws", -1: "losses"}[result]] += 1
+	results["nodes"] = solver.nodes
+	results["nodes_per_second"] = solver.nodes_per_second()
+	return results
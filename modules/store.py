@@ -0,0 +1,373 @@
+"""
+Populations larger than memory
+
+A PopulationStore keeps its genomes in a binary population file and
+only ever maps a block of rows of it at a time, so the memory used by
+a generation is bounded by the working set rather than the size of
+the population. Standings are kept in memory, 16 bytes an agent
+
+Classes
+-------
+PopulationStore
+	a population kept in a population file and worked on in blocks
+"""
+
+import numpy as np
+from . import checkpoint, league
+from .simple_gen_neural_net import GenomeArena, StackedNetworks, breed_genomes
+
+#bytes of genomes in memory at once
+WORKING_SET = 256 << 20
+
+class PopulationStore(object):
+	"""
+	A population kept in a population file and worked on in blocks
+
+	A season plays each block of agents against a random partner block,
+	every agent playing opponents sampled from the two blocks once
+	with each colour. The partner blocks are shuffled every season so
+	agents meet the whole population over the generations. Agents are
+	ranked on the fraction of their games they won, as the number of
+	games each plays varies
+
+	Attributes
+	----------
+	filename: str
+
+	num_nodes: tuple of int
+		number of nodes at input and then every layer afterwards
+
+	pop_size: int
+
+	block_size: int
+		rows of genomes mapped at a time
+
+	standings: narray
+		(pop_size, 2) wins and losses of each agent
+
+	games: int
+		games in the last season
+
+	generation: int
+		generations the population had been trained for when opened
+
+	precision: str
+		precision the agents choose moves at, one of PRECISIONS
+
+	Methods
+	-------
+	create(filename, pop_size=POP_SIZE, working_set=WORKING_SET, num_nodes=NET_STRUCT): PopulationStore
+		creates a file of random agents
+
+	open(filename, working_set=WORKING_SET): PopulationStore
+		opens an existing population file
+
+	use_precision(precision)
+		selects the precision agents choose moves at
+
+	blocks(): iterator of tuples of two ints
+		the start and stop rows of each block
+
+	read(rows): narray
+		copies the genomes of rows into memory
+
+	networks(rows): list of SimpleGenNeuralNet
+		copies of the agents in rows
+
+	play_season(opponents=8)
+		plays every agent against opponents from its own block and a
+		partner block
+
+	ranking(): narray
+		rows from best to worst
+
+	gather_top(n=SURVIVE_MIN, nmax=SURVIVE_MAX): narray
+		rows of between n and nmax of the agents with the best win rate
+
+	repop_from(parents)
+		replaces every agent but parents with their children
+
+	save(generation, **metadata)
+		writes the standings and ranking to the file's header
+	"""
+	def __init__(self, filename, working_set=WORKING_SET):
+		"""
+		Parameters
+		----------
+		filename: str
+			an existing population file
+
+		working_set: int, optional
+			bytes of genomes held in memory at once, at least one agent
+			is mapped at a time however small(defaults to WORKING_SET)
+		"""
+		super(PopulationStore, self).__init__()
+		self.filename = filename
+		header = checkpoint.read_header(filename)
+		self._offset = header["offset"]
+		self.num_nodes = tuple(header["net_struct"])
+		self.pop_size = header["pop_size"]
+		self.generation = header["generation"]
+		self._length = sum((inputs + 1) * size for inputs, size in\
+			zip(self.num_nodes, self.num_nodes[1:]))
+		#a season holds a block and its partner along with their stack
+		self._row_bytes = self._length * np.dtype(np.float64).itemsize
+		self.block_size = max(1, min(self.pop_size, working_set // (3 * self._row_bytes)))
+		self.precision = "float64"
+		self.games = 0
+		self.standings = np.zeros((self.pop_size, 2), dtype=np.int64)
+
+	@classmethod
+	def create(cls, filename, pop_size=league.POP_SIZE, working_set=WORKING_SET,\
+		num_nodes=league.NET_STRUCT):
+		"""
+		creates a file of random agents
+
+		the agents are randomized a block at a time
+
+		Parameters
+		----------
+		filename: str
+
+		pop_size: int, optional
+			number of agents(defaults to POP_SIZE)
+
+		working_set: int, optional
+			bytes of genomes held in memory at once
+			(defaults to WORKING_SET)
+
+		num_nodes: tuple of int, optional
+			structure of the agents(defaults to NET_STRUCT)
+
+		Returns
+		-------
+		PopulationStore
+		"""
+		checkpoint.create(filename, num_nodes, pop_size)
+		store = cls(filename, working_set)
+		for start, stop in store.blocks():
+			block = store._map(start, stop, "r+")
+			block[:] = np.random.random_sample(block.shape)
+			block.flush()
+			del block
+		return store
+
+	@classmethod
+	def open(cls, filename, working_set=WORKING_SET):
+		"""
+		opens an existing population file
+
+		Parameters
+		----------
+		filename: str
+
+		working_set: int, optional
+			bytes of genomes held in memory at once
+			(defaults to WORKING_SET)
+
+		Returns
+		-------
+		PopulationStore
+		"""
+		return cls(filename, working_set)
+
+	def use_precision(self, precision):
+		"""
+		selects the precision agents choose moves at
+
+		Parameters
+		----------
+		precision: str
+			one of PRECISIONS, "float64", "float32" or "int8"
+		"""
+		if precision not in league.PRECISIONS:
+			raise Exception("unknown precision {}, choose from {}".format(precision, league.PRECISIONS))
+		self.precision = precision
+
+	def _map(self, start, stop, mode="r"):
+		#memory map of only the rows from start to stop
+		return np.memmap(self.filename, dtype=np.float64, mode=mode,\
+			offset=self._offset + start * self._row_bytes, shape=(stop - start, self._length))
+
+	def blocks(self):
+		"""
+		the start and stop rows of each block
+
+		Returns
+		-------
+		iterator of tuples of two ints
+		"""
+		for start in range(0, self.pop_size, self.block_size):
+			yield start, min(start + self.block_size, self.pop_size)
+
+	def read(self, rows):
+		"""
+		copies the genomes of rows into memory
+
+		Parameters
+		----------
+		rows: list of int
+
+		Returns
+		-------
+		narray
+			(len(rows), genome length) in the order of rows
+		"""
+		#read row by row rather than through a map of the whole file,
+		#where readahead around scattered rows would be mapped in too
+		genomes = np.empty((len(rows), self._length))
+		with open(self.filename, "rb", buffering=0) as f:
+			for genome, row in zip(genomes, rows):
+				f.seek(self._offset + int(row) * self._row_bytes)
+				f.readinto(genome)
+		return genomes
+
+	def networks(self, rows):
+		"""
+		copies of the agents in rows
+
+		Parameters
+		----------
+		rows: list of int
+
+		Returns
+		-------
+		list of SimpleGenNeuralNet
+		"""
+		return GenomeArena(*self.num_nodes, genomes=self.read(rows)).networks
+
+	def play_season(self, opponents=8):
+		"""
+		plays every agent against opponents from its own block and a
+		partner block
+
+		each agent plays each of its opponents once going first and
+		once going second, resets standings first
+
+		Parameters
+		----------
+		opponents: int, optional
+			opponents sampled for each agent(defaults to 8)
+		"""
+		self.standings[:] = 0
+		self.games = 0
+		blocks = list(self.blocks())
+		partners = np.random.permutation(len(blocks))
+		for (start, stop), partner in zip(blocks, partners):
+			rows = np.arange(start, stop)
+			genomes = np.array(self._map(start, stop))
+			partner_start, partner_stop = blocks[partner]
+			if partner_start != start:
+				rows = np.concatenate([rows, np.arange(partner_start, partner_stop)])
+				genomes = np.concatenate([genomes, self._map(partner_start, partner_stop)])
+			if len(rows) < 2:
+				continue
+
+			#opponents other than the agent itself
+			players = np.repeat(np.arange(stop - start), min(opponents, len(rows) - 1))
+			others = np.random.randint(len(rows) - 1, size=len(players))
+			others += others >= players
+			firsts = np.concatenate([players, others])
+			seconds = np.concatenate([others, players])
+			stack = StackedNetworks.from_genomes(genomes, *self.num_nodes,\
+				precision=self.precision)
+			winners = league.play_batch(stack, np.stack([firsts, seconds], axis=1))
+			self.games += len(firsts)
+
+			decided = winners != 0
+			first_won = winners[decided] == 1
+			firsts = rows[firsts[decided]]
+			seconds = rows[seconds[decided]]
+			np.add.at(self.standings[:, 0], np.where(first_won, firsts, seconds), 1)
+			np.add.at(self.standings[:, 1], np.where(first_won, seconds, firsts), 1)
+			del stack, genomes
+
+	def _fitness(self):
+		return self.standings[:, 0] / np.maximum(self.standings.sum(axis=1), 1)
+
+	def ranking(self):
+		"""
+		rows from best to worst
+
+		ties keep the order of the rows
+
+		Returns
+		-------
+		narray
+		"""
+		return np.argsort(-self._fitness(), kind="stable")
+
+	def gather_top(self, n=league.SURVIVE_MIN, nmax=league.SURVIVE_MAX):
+		"""
+		rows of between n and nmax of the agents with the best win rate
+
+		Parameters
+		----------
+		n: int, optional
+			the minimum number of rows returned(defaults to SURVIVE_MIN)
+		nmax: int, optional
+			the maximum number of rows returned(defaults to SURVIVE_MAX)
+
+		Returns
+		-------
+		narray
+			rows from the best agent down
+		"""
+		return league.top_indices(self._fitness(), n, nmax)
+
+	def repop_from(self, parents):
+		"""
+		replaces every agent but parents with their children
+
+		children are bred a chunk at a time, with only the parents of
+		the chunk read into memory, two different parents are chosen at
+		random to crossover and then the child is mutated
+
+		Parameters
+		----------
+		parents: list of int
+			rows of the agents kept, at least two
+		"""
+		parents = np.asarray(parents, dtype=np.intp)
+		count = len(parents)
+		kept = np.zeros(self.pop_size, dtype=bool)
+		kept[parents] = True
+		#a chunk's children, both their parents and the crossover are
+		#held at once, a few chunks fit in a block
+		chunk = max(1, self.block_size // 2)
+		for start, stop in self.blocks():
+			children = np.flatnonzero(~kept[start:stop])
+			for first in range(0, len(children), chunk):
+				rows = children[first:first + chunk]
+				parents1 = np.random.randint(count, size=len(rows))
+				parents2 = np.random.randint(count - 1, size=len(rows))
+				parents2 += parents2 >= parents1
+				needed, inverse = np.unique(parents[np.concatenate([parents1, parents2])],\
+					return_inverse=True)
+				genomes = self.read(needed)
+				bred = breed_genomes(genomes[inverse[:len(rows)]], genomes[inverse[len(rows):]],\
+					league.MUTATED_NODES, *self.num_nodes)
+				del genomes
+
+				block = self._map(start, stop, "r+")
+				block[rows] = bred
+				block.flush()
+				del block, bred
+		self.standings[:] = 0
+
+	def save(self, generation, **metadata):
+		"""
+		writes the standings and ranking to the file's header
+
+		Parameters
+		----------
+		generation: int
+			number of generations the population has been trained for
+
+		metadata - keyword:
+			any other json serializable values to keep in the header
+		"""
+		ranking = self.ranking().tolist() if self.standings.any() else []
+		checkpoint.update_header(self.filename, self.standings.tolist(), generation,\
+			ranking=ranking, **metadata)
+		self._offset = checkpoint.read_header(self.filename)["offset"]
@@ -0,0 +1,179 @@
+"""
+Live training telemetry over HTTP
+
+Classes
+-------
+Telemetry
+	serves the latest generation's metrics in the Prometheus text
+	format from a background thread
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+#per generation counters from league.counters that are also kept as totals
+_TOTALS = ("games", "plies", "forward_passes")
+
+class Telemetry(object):
+	"""
+	Serves the latest generation's metrics in the Prometheus text
+	format from a background thread
+
+	The training loop only hands over the line Metrics.write returned
+	and the top standings once a generation, the text is built by the
+	server thread when it is scraped. GET /metrics, or any other path,
+	returns
+
+	c4_generation, c4_generations_per_second, c4_games_per_second
+	c4_phase_seconds{phase}: seconds of each phase of the generation
+	c4_cache_hit_rate{cache}: of the match cache and move memo
+	c4_games_total, c4_plies_total, c4_forward_passes_total
+	c4_rss_bytes, c4_process_peak_rss_bytes: resident set size at the
+	end of the generation and the highest the process has reached
+	c4_top_wins{rank}, c4_top_losses{rank}, c4_top_rating{rank}
+	c4_<key> for every other number on the metrics line
+
+	Attributes
+	----------
+	address: tuple of str and int
+		host and port the server is bound to
+
+	Methods
+	-------
+	start()
+		starts serving on a daemon thread
+
+	publish(record, standings, ratings=None)
+		replaces the metrics served with those of a new generation
+
+	render(): str
+		the metrics in the Prometheus text format
+
+	close()
+		stops the server
+	"""
+	def __init__(self, host="127.0.0.1", port=9100):
+		"""
+		Parameters
+		----------
+		host: str, optional
+			(defaults to "127.0.0.1")
+
+		port: int, optional
+			0 picks a free port(defaults to 9100)
+		"""
+		super(Telemetry, self).__init__()
+		telemetry = self
+
+		class Handler(BaseHTTPRequestHandler):
+			def do_GET(self):
+				body = telemetry.render().encode("utf-8")
+				self.send_response(200)
+				self.send_header("Content-Type", "text/plain; version=0.0.4")
+				self.send_header("Content-Length", str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, *args):
+				pass
+
+		self._server = ThreadingHTTPServer((host, port), Handler)
+		self._server.daemon_threads = True
+		self.address = self._server.server_address
+		self._thread = None
+		self._totals = dict((key, 0) for key in _TOTALS)
+		self._previous = None
+		self._latest = None
+
+	def start(self):
+		"""
+		starts serving on a daemon thread
+		"""
+		self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+		self._thread.start()
+
+	def publish(self, record, standings, ratings=None):
+		"""
+		replaces the metrics served with those of a new generation
+
+		Parameters
+		----------
+		record: dict
+			line of the generation returned by Metrics.write
+
+		standings: narray
+			(k, 2) wins and losses of the top agents, best first
+
+		ratings: narray, optional
+			ratings of the same agents after a rated season
+		"""
+		for key in _TOTALS:
+			self._totals[key] += record.get(key, 0)
+		elapsed = None
+		if self._previous is not None:
+			elapsed = record["time"] - self._previous
+		self._previous = record["time"]
+		#one assignment, so the server thread never sees half an update
+		self._latest = (record, dict(self._totals), elapsed, standings, ratings)
+
+	def render(self):
+		"""
+		the metrics in the Prometheus text format
+
+		Returns
+		-------
+		str
+		"""
+		latest = self._latest
+		if latest is None:
+			return ""
+		record, totals, elapsed, standings, ratings = latest
+
+		lines = []
+		typed = set()
+		def metric(name, kind, value, **labels):
+			if name not in typed:
+				typed.add(name)
+				lines.append("# TYPE {} {}".format(name, kind))
+			label = ",".join('{}="{}"'.format(key, value) for key, value in labels.items())
+			lines.append("{}{} {}".format(name, "{" + label + "}" if label else "", float(value)))
+
+		metric("c4_generation", "gauge", record["generation"])
+		if elapsed:
+			metric("c4_generations_per_second", "gauge", 1.0 / elapsed)
+			metric("c4_games_per_second", "gauge", record.get("games", 0) / elapsed)
+		for phase, seconds in record["seconds"].items():
+			metric("c4_phase_seconds", "gauge", seconds, phase=phase)
+		for cache, prefix in (("match", "cache"), ("memo", "memo")):
+			lookups = record.get(prefix + "_hits", 0) + record.get(prefix + "_misses", 0)
+			if lookups:
+				metric("c4_cache_hit_rate", "gauge", record[prefix + "_hits"] / lookups, cache=cache)
+		for key, value in totals.items():
+			metric("c4_{}_total".format(key), "counter", value)
+		if "rss_kb" in record:
+			metric("c4_rss_bytes", "gauge", record["rss_kb"] * 1024)
+		metric("c4_process_peak_rss_bytes", "gauge", record["process_peak_rss_kb"] * 1024)
+		#the samples of a metric are kept together
+		for column, name in enumerate(("c4_top_wins", "c4_top_losses")):
+			for rank, value in enumerate(standings[:, column].tolist(), 1):
+				metric(name, "gauge", value, rank=rank)
+		if ratings is not None:
+			for rank, rating in enumerate(ratings.tolist(), 1):
+				metric("c4_top_rating", "gauge", rating, rank=rank)
+
+		shown = set(_TOTALS) | set(["generation", "time", "rss_kb", "process_peak_rss_kb"])
+		for key, value in record.items():
+			if key not in shown and not key.endswith(("_hits", "_misses"))\
+				and isinstance(value, (int, float)) and not isinstance(value, bool):
+				metric("c4_" + key, "gauge", value)
+		return "\n".join(lines) + "\n"
+
+	def close(self):
+		"""
+		stops the server
+		"""
+		if self._thread is not None:
+			self._server.shutdown()
+			self._thread.join()
+			self._thread = None
+		self._server.server_close()
@@ -7,17 +7,21 @@ This script allows the user to compete in a connect four game with \
 the winningest agent in a json file of agent representations from \
 the train.py script
 
+Only the top agent is loaded from files that keep a ranking, older \
+files without one play a season to find it
+
 'Numpy' is required to be installed on the python environment\
  on which this script is running
  """
 
 import argparse
 import json
-from modules import board, league
+from modules import board, checkpoint, league
 from modules import game as game_mod
+from modules.simple_gen_neural_net import SimpleGenNeuralNet
 
 def agent_choice(agent, game_board, current_player, game):
-	return league.choose_move(agent, game_board, current_player)
+	return league.choose_move(agent, game.inputs, current_player)
 
 def human_choice(agent, game_board, current_player, game):
 	return board.get_move(len(game.board[0]))
@@ -46,27 +50,40 @@ def play(agent, human_first):
 			board.win.close()
 			break
 
+def load_top(filename):
+	#the best agent of a population file, a season is played to find 
+	#it when the file has no ranking
+	agents = league.League()
+	if checkpoint.is_checkpoint(filename):
+		header = checkpoint.read_header(filename)
+		if header.get("ranking"):
+			return checkpoint.read_network(filename, header["ranking"][0], header)
+		agents.populate_from_checkpoint(filename)
+	else:
+		if not filename.lower().endswith(".json"):
+			filename = filename + ".json"
+
+		with open(filename, "r") as f:
+			data = json.load(f)
+
+		if isinstance(data, dict) and data["ranking"]:
+			return SimpleGenNeuralNet.from_export(data["agents"][data["ranking"][0]])
+		agents.populate_from_export(data)
+	agents.play_season()
+
+	return agents.gather_top(n=1,nmax=1)[0]
+
 def main():
 	parser = argparse.ArgumentParser(description=__doc__, 
 		formatter_class=argparse.RawDescriptionHelpFormatter)
 	parser.add_argument("file", type=str,
-		help="The json file with the agents to compete against")
+		help="The json or " + checkpoint.EXTENSION + " file with the agents to compete against")
 	player_choice = parser.add_mutually_exclusive_group()
 	player_choice.add_argument("-p1", "--player1", action="store_true")
 	player_choice.add_argument("-p2", "--player2", action="store_true")
 	args = parser.parse_args()
 
-	filename = args.file
-	if not filename.lower().endswith(".json"):
-		filename = filename + ".json"
-
-	with open(filename, "r") as f:
-		data = json.load(f)
-
-	league.populate_from_export(data)
-	league.play_season()
-
-	agent = league.gather_top(n=1,nmax=1)[0]
+	agent = load_top(args.file)
 
 	play(agent, not args.player2)
 
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+"""
+Connect Four Move Server
+
+This script serves the moves of the best agents in a population file 
+from the train.py script over HTTP, answering concurrent requests in
+micro-batches
+
+POST /move with {"board": [[...], ...], "player": 1, "agent": 0}
+GET /stats for throughput and latency
+
+'Numpy' is required to be installed on the python environment\
+ on which this script is running
+ """
+
+import argparse
+import asyncio
+import json
+from modules import checkpoint, league
+from modules.server import MoveServer
+from modules.simple_gen_neural_net import StackedNetworks
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, 
+		formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("file", type=str,
+		help="The json or " + checkpoint.EXTENSION + " file with the agents to serve")
+	parser.add_argument("--host", type=str, default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=8080)
+	parser.add_argument("-k", "--top", type=int, default=league.SURVIVE_MIN,
+		help="Number of best agents served, requests pick one by rank")
+	parser.add_argument("--max-batch", type=int, default=256,
+		help="Most requests answered by one forward pass")
+	parser.add_argument("--max-wait-ms", type=float, default=2.0,
+		help="Most milliseconds a request waits for its batch to fill")
+	args = parser.parse_args()
+
+	agents = league.League()
+	filename = args.file
+	if checkpoint.is_checkpoint(filename):
+		ranking = agents.populate_from_checkpoint(filename).get("ranking")
+	else:
+		if not filename.lower().endswith(".json"):
+			filename = filename + ".json"
+
+		with open(filename, "r") as f:
+			data = json.load(f)
+
+		agents.populate_from_export(data)
+		ranking = data["ranking"] if isinstance(data, dict) else None
+
+	#files without a ranking are ranked by playing a season
+	if ranking:
+		top = [agents.population[index] for index in ranking[:args.top]]
+	else:
+		agents.play_season(batched=True)
+		top = agents.gather_top(n=args.top, nmax=args.top)
+	server = MoveServer(StackedNetworks(top), args.max_batch, args.max_wait_ms / 1000.0)
+	print("Serving {} agents on http://{}:{}".format(len(top), args.host, args.port))
+	try:
+		asyncio.run(server.serve(args.host, args.port))
+	except KeyboardInterrupt:
+		pass
+
+if __name__ == '__main__':
+	main()
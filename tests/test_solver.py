@@ -0,0 +1,48 @@
+import random
+import unittest
+from modules.game import COLUMNS
+from modules.solver import SIZE, Solver, _column_mask, _possible, _winning_slots
+
+def _exact(position, mask, moves):
+	#score of the player to move by searching every move, as in the
+	#solver's module docstring
+	if moves == SIZE:
+		return 0
+	possible = _possible(mask)
+	if _winning_slots(position, mask) & possible:
+		return (SIZE + 1 - moves) // 2
+	return max(-_exact(position ^ mask, mask | (possible & _column_mask(column)), moves + 1)\
+		for column in range(COLUMNS) if possible & _column_mask(column))
+
+def _endgame(rng, remaining):
+	#random position with remaining plies left that nobody has won and
+	#the player to move can not win at once, or None
+	position, mask = 0, 0
+	for moves in range(SIZE - remaining):
+		possible = _possible(mask) & ~_winning_slots(position, mask)
+		columns = [column for column in range(COLUMNS) if possible & _column_mask(column)]
+		if not columns:
+			return None
+		move = possible & _column_mask(rng.choice(columns))
+		position, mask = position ^ mask, mask | move
+	if _winning_slots(position, mask) & _possible(mask):
+		return None
+	return position, mask
+
+class NegamaxTest(unittest.TestCase):
+	def test_odd_plies_left(self):
+		rng = random.Random(3)
+		tested = 0
+		while tested < 40:
+			endgame = _endgame(rng, 9)
+			if endgame is None:
+				continue
+			position, mask = endgame
+			solver = Solver()
+			solver._deadline = solver._node_limit = None
+			score = solver._negamax(position, mask, SIZE - 9, -SIZE, SIZE, 9)
+			self.assertEqual(score, _exact(position, mask, SIZE - 9))
+			tested += 1
+
+if __name__ == "__main__":
+	unittest.main()
@@ -11,7 +11,214 @@ This script allows the user to train a population of agents to play connect four
 
 import argparse
 import json
-from modules import league
+import os
+import numpy as np
+from modules import checkpoint, islands, league, solver
+from modules.store import PopulationStore
+from modules.cache import MatchCache, MoveMemo
+from modules.game_log import GameLog
+from modules.hall_of_fame import EVICTIONS, HallOfFame
+from modules.metrics import Metrics, WindowProfiler
+from modules.telemetry import Telemetry
+from modules.parallel import SeasonPool
+from modules.game import ENGINES
+
+def _write_metrics(metrics, generation, cache, memo, verbose, **extra):
+	if cache is not None:
+		if verbose:
+			print("Match cache : {} hits, {} misses".format(cache.hits, cache.misses))
+		extra["cache_hits"] = cache.hits
+		extra["cache_misses"] = cache.misses
+		cache.reset_counts()
+	if memo is not None:
+		if verbose:
+			print("Move memo : {:.1%} hit rate, {} moves held".format(memo.hit_rate(), len(memo)))
+		extra["memo_hits"] = memo.hits
+		extra["memo_misses"] = memo.misses
+		memo.reset_counts()
+	return metrics.write(generation, **extra)
+
+def _telemetry(args):
+	#started telemetry server, or None when it is not wanted
+	if args.telemetry_port is None:
+		return None
+	telemetry = Telemetry(args.telemetry_host, args.telemetry_port)
+	telemetry.start()
+	if args.verbose:
+		print("Telemetry on http://{}:{}/metrics".format(*telemetry.address))
+	return telemetry
+
+def _publish(telemetry, record, standings, ratings, ranking, top):
+	ranking = np.asarray(ranking[:top], dtype=np.intp)
+	telemetry.publish(record, standings[ranking], None if ratings is None else ratings[ranking])
+
+def _measure(top, precision, generation, args, metrics, opponent, positions):
+	#metrics of the top agents that are not taken every generation
+	extra = {}
+	if opponent is not None and generation % args.solver_every == 0:
+		with metrics.phase("solver"):
+			results = solver.evaluate(top(), opponent)
+		if args.verbose:
+			print("Against solver : {wins} wins, {draws} draws, {losses} losses, "\
+				"{nodes_per_second:.0f} nodes/s".format(**results))
+		extra.update(("solver_" + key, value) for key, value in results.items())
+	if positions is not None:
+		with metrics.phase("disagreement"):
+			extra["argmax_disagreement"] = league.argmax_disagreement(top(), precision, positions)
+		if args.verbose:
+			print("Moves differing from float64 : {:.2%}".format(extra["argmax_disagreement"]))
+	return extra
+
+def _solver(args):
+	if args.solver_every > 0:
+		return solver.Solver(args.solver_depth or None, args.solver_nodes or None,\
+			args.solver_seconds or None)
+	return None
+
+def _hall_file(checkpoint_file):
+	#the hall of fame is saved beside the checkpoint it belongs to
+	return checkpoint_file[:-len(checkpoint.EXTENSION)] + ".hall" + checkpoint.EXTENSION
+
+def _train(current, args, tournament, start, generation, checkpoint_file):
+	#runs the generations of a single league in this process
+	pool = SeasonPool(args.workers) if args.workers > 0 else None
+	cache = MatchCache(args.match_cache) if args.match_cache > 0 else None
+	memo = MoveMemo(args.move_memo) if args.move_memo > 0 and not args.batched\
+		and pool is None else None
+	writer = checkpoint.SnapshotWriter()
+	metrics = Metrics(args.metrics)
+	opponent = _solver(args)
+	positions = None
+	if current.precision != "float64":
+		positions = league.reference_positions()
+	hall_of_fame = None
+	if args.hall_of_fame > 0 and args.resume:
+		hall_of_fame = HallOfFame.load(_hall_file(checkpoint_file), generation + start)
+		hall_of_fame.opponents = args.hall_opponents
+		hall_of_fame.evict = args.hall_evict
+	elif args.hall_of_fame > 0:
+		hall_of_fame = HallOfFame(args.hall_of_fame, args.hall_opponents, args.hall_evict)
+	telemetry = _telemetry(args)
+	game_log = GameLog(args.game_log, generation + start) if args.game_log != None else None
+	profiler = None
+	if args.profile != None:
+		profiler = WindowProfiler.from_window(args.profile, args.profile_output)
+	try:
+		if not args.resume:
+			with metrics.phase("play_season"):
+				current.play_season(args.batched, pool, cache, tournament, memo, game_log=game_log)
+			if hall_of_fame is not None:
+				hall_of_fame.add(current.gather_top(), generation)
+			_write_metrics(metrics, 0, cache, memo, False, season_games=current.games)
+		for x in range(start + 1, args.generations + 1):
+			if profiler is not None:
+				profiler.start(x)
+			if args.verbose:
+				print("Generation :", x)
+			with metrics.phase("gather_top"):
+				parents = current.gather_top()
+			with metrics.phase("repop_from"):
+				current.repop_from(parents)
+			if args.verbose:
+				print("Genome arena : {} rows reused, {} allocated".format(current.reused,\
+					current.allocated))
+			if game_log is not None:
+				game_log.generation = generation + x
+				log_offset = game_log.offset
+			with metrics.phase("play_season"):
+				current.play_season(args.batched, pool, cache, tournament, memo, hall_of_fame,\
+					game_log)
+			if args.verbose:
+				print("Games :", current.games)
+			#champions join once they have been scored, so they never
+			#play the season they were top in
+			if hall_of_fame is not None:
+				hall_of_fame.add(current.gather_top(), generation + x)
+			if args.checkpoint_every > 0 and x % args.checkpoint_every == 0:
+				with metrics.phase("checkpoint"):
+					current.save_checkpoint(checkpoint_file, generation + x, writer,\
+						run_generation=x, rng=checkpoint.rng_state())
+					if hall_of_fame is not None:
+						hall_of_fame.save(_hall_file(checkpoint_file), generation + x)
+			extra = _measure(current.gather_top, current.precision, x, args, metrics,\
+				opponent, positions)
+			extra["arena_reused"] = current.reused
+			extra["arena_allocated"] = current.allocated
+			if game_log is not None:
+				extra["game_log_offset"] = log_offset
+			if hall_of_fame is not None:
+				extra["hall_of_fame_size"] = len(hall_of_fame)
+				if hall_of_fame.season_games > 0:
+					extra["hall_of_fame_win_rate"] = hall_of_fame.season_wins / hall_of_fame.season_games
+					if args.verbose:
+						print("Against hall of fame : {:.1%} won, {} champions held".format(\
+							extra["hall_of_fame_win_rate"], len(hall_of_fame)))
+			record = _write_metrics(metrics, x, cache, memo, args.verbose,\
+				season_games=current.games, **extra)
+			if telemetry is not None:
+				_publish(telemetry, record, current.standings, current.ratings, current.ranking(),\
+					args.telemetry_top)
+			if profiler is not None:
+				profiler.stop(x)
+	finally:
+		writer.wait()
+		metrics.close()
+		if telemetry is not None:
+			telemetry.close()
+		if game_log is not None:
+			game_log.close()
+		if pool is not None:
+			pool.close()
+
+def _train_store(args):
+	#runs the generations of a population kept in a population file,
+	#with the number of survivors scaled to the size of the population
+	working_set = args.working_set << 20
+	if args.generate and os.path.exists(args.store):
+		print("This will overwrite your store file with a new random population")
+		confirmation = input("type \"Y\" to confirm: ")
+		if confirmation != "Y" and confirmation != "Yes":
+			return
+	if args.generate or not os.path.exists(args.store):
+		population = PopulationStore.create(args.store, args.pop_size, working_set)
+	else:
+		population = PopulationStore.open(args.store, working_set)
+	population.use_precision(args.precision)
+	n = max(league.SURVIVE_MIN, population.pop_size * league.SURVIVE_MIN // league.POP_SIZE)
+	nmax = n * league.SURVIVE_MAX // league.SURVIVE_MIN
+	top = lambda: population.networks(population.gather_top(n, nmax)[:league.SURVIVE_MAX])
+
+	metrics = Metrics(args.metrics)
+	opponent = _solver(args)
+	positions = None
+	if population.precision != "float64":
+		positions = league.reference_positions()
+	telemetry = _telemetry(args)
+	try:
+		with metrics.phase("play_season"):
+			population.play_season(args.opponents)
+		metrics.write(0, season_games=population.games)
+		for x in range(1, args.generations + 1):
+			if args.verbose:
+				print("Generation :", x)
+			with metrics.phase("gather_top"):
+				parents = population.gather_top(n, nmax)
+			with metrics.phase("repop_from"):
+				population.repop_from(parents)
+			with metrics.phase("play_season"):
+				population.play_season(args.opponents)
+			if args.verbose:
+				print("Games :", population.games)
+			extra = _measure(top, population.precision, x, args, metrics, opponent, positions)
+			record = metrics.write(x, season_games=population.games, **extra)
+			if telemetry is not None:
+				_publish(telemetry, record, population.standings, None,\
+					population.gather_top(args.telemetry_top, args.telemetry_top), args.telemetry_top)
+	finally:
+		metrics.close()
+		if telemetry is not None:
+			telemetry.close()
+	population.save(population.generation + args.generations)
 
 def main():
 	parser = argparse.ArgumentParser(description=__doc__, 
@@ -19,15 +226,110 @@ def main():
 	parser.add_argument("generations", type=int,
 		help="Number of generations for the genetic algorithm to run")
 	parser.add_argument("-v", "--verbose", action="store_true")
+	parser.add_argument("--engine", choices=sorted(ENGINES), default="bitboard",
+		help="Game engine used for league games, legacy is the original list based engine")
+	parser.add_argument("-b", "--batched", action="store_true",
+		help="Play every game of a season in lockstep with a batched game engine")
+	parser.add_argument("-w", "--workers", type=int, default=0,
+		help="Play each season across this many worker processes")
+	parser.add_argument("--precision", choices=league.PRECISIONS, default="float64",
+		help="Precision agents choose moves at in league games, the weights are kept in float64")
+	parser.add_argument("-t", "--tournament", choices=sorted(league.TOURNAMENTS), default="round-robin",
+		help="How the games of a season are scheduled")
+	parser.add_argument("--rounds", type=int, default=7,
+		help="Rounds of a swiss tournament")
+	parser.add_argument("--opponents", type=int, default=8,
+		help="Opponents each agent plays in a sampled tournament, in each round of a racing tournament, or in a season of a --store population")
+	parser.add_argument("--keep", type=float, default=0.5,
+		help="Fraction of agents a racing tournament keeps playing after each round")
+	parser.add_argument("--confidence", type=float, default=0.0,
+		help="Standard errors an agent must trail the last survivor by to be eliminated from a racing tournament")
+	parser.add_argument("--rating", choices=["wins", "elo", "bradley-terry"],
+		help="What agents are ranked on, defaults to wins for round-robin and racing and elo otherwise")
+	parser.add_argument("--match-cache", type=int, default=65536, metavar="N",
+		help="Reuse the results of up to N games between unchanged agents, 0 disables the cache")
+	parser.add_argument("--move-memo", type=int, default=262144, metavar="N",
+		help="Remember up to N moves by agent and position when games are played one at a time, 0 disables the memo")
 	parser.add_argument("-o", "--output", type=str,
-		help="Outputs a json representation of the population to a file")
+		help="Outputs the population to a file, a binary population file if it ends with "\
+		+ checkpoint.EXTENSION + " and json otherwise")
+	parser.add_argument("--checkpoint-every", type=int, default=0, metavar="K",
+		help="Snapshot the population, standings and random state every K generations")
+	parser.add_argument("--checkpoint-file", type=str, default="checkpoint" + checkpoint.EXTENSION,
+		help="File the snapshots are written to and resumed from")
+	parser.add_argument("--resume", action="store_true",
+		help="Continue an interrupted run from its checkpoint file")
+	parser.add_argument("--metrics", type=str, metavar="FILE",
+		help="Appends a json line of phase timings, games, plies, forward passes and memory for each generation")
+	parser.add_argument("--game-log", type=str, metavar="FILE",
+		help="Appends the agents, moves and result of every league game played to a binary game log")
+	parser.add_argument("--telemetry-port", type=int, metavar="PORT",
+		help="Serves live metrics of the run in the Prometheus text format on this port")
+	parser.add_argument("--telemetry-host", type=str, default="127.0.0.1",
+		help="Address the telemetry is served on")
+	parser.add_argument("--telemetry-top", type=int, default=league.SURVIVE_MIN, metavar="K",
+		help="Number of top agents whose standings the telemetry serves")
+	parser.add_argument("--profile", type=str, metavar="FIRST:LAST",
+		help="Profiles the generations from FIRST to LAST with cProfile")
+	parser.add_argument("--profile-output", type=str, default="train.prof",
+		help="File the profile stats are written to")
+	parser.add_argument("--solver-every", type=int, default=0, metavar="K",
+		help="Plays the top agents against a connect four solver every K generations")
+	parser.add_argument("--solver-depth", type=int, default=6,
+		help="Plies the solver searches ahead, 0 plays perfectly")
+	parser.add_argument("--solver-nodes", type=int, default=0, metavar="N",
+		help="Nodes the solver may search for each move, 0 for no limit")
+	parser.add_argument("--solver-seconds", type=float, default=0,
+		help="Seconds the solver may search for each move, 0 for no limit")
+	parser.add_argument("--hall-of-fame", type=int, default=0, metavar="N",
+		help="Keeps up to N distinct past top agents for the population to play each season, 0 disables it")
+	parser.add_argument("--hall-opponents", type=int, default=4,
+		help="Champions from the hall of fame every agent plays each season")
+	parser.add_argument("--hall-evict", choices=EVICTIONS, default="age",
+		help="Champion a full hall of fame drops, the oldest or the lowest win rate against the population")
+	parser.add_argument("--islands", type=int, default=0, metavar="M",
+		help="Trains M separate populations in their own processes that exchange top agents")
+	parser.add_argument("--migrate-every", type=int, default=10, metavar="K",
+		help="Generations between migrations of top agents between islands")
+	parser.add_argument("--migrants", type=int, default=2,
+		help="Top agents each island sends to the next on every migration")
+	parser.add_argument("--store", type=str, metavar="FILE",
+		help="Trains a population kept in this " + checkpoint.EXTENSION + " file and read a "\
+		"block at a time, created when it does not exist or with -g")
+	parser.add_argument("--pop-size", type=int, default=league.POP_SIZE,
+		help="Agents in a --store population when it is created")
+	parser.add_argument("--working-set", type=int, default=256, metavar="MB",
+		help="Megabytes of genomes of a --store population held in memory at once")
 	initial_pop = parser.add_mutually_exclusive_group()
 	initial_pop.add_argument("-g", "--generate", action="store_true",
 		help="Generates a random initial population")
 	initial_pop.add_argument("-f", "--file", type=str,
-		help="Start with a previous population from an output file")
+		help="Start with a previous population from an output file, json or "\
+		+ checkpoint.EXTENSION)
 
 	args = parser.parse_args()
+	if args.islands > 0:
+		#islands train in their own processes, only their final 
+		#populations come back
+		if args.resume or args.checkpoint_every > 0 or args.workers > 0 or args.hall_of_fame > 0\
+			or args.game_log != None or args.verbose or args.metrics != None\
+			or args.profile != None or args.telemetry_port != None or args.solver_every > 0:
+			parser.error("--islands can not be used with --resume, --checkpoint-every, --workers, "\
+				"--hall-of-fame, --game-log, --verbose, --metrics, --profile, --telemetry-port "\
+				"or --solver-every")
+		if args.file != None and not checkpoint.is_checkpoint(args.file):
+			parser.error("islands can only start from a " + checkpoint.EXTENSION + " population file")
+
+	if args.store != None:
+		if args.islands > 0 or args.resume or args.checkpoint_every > 0 or args.workers > 0\
+			or args.file != None or args.output != None or args.hall_of_fame > 0\
+			or args.game_log != None:
+			parser.error("--store can not be used with --islands, --resume, --checkpoint-every, "\
+				"--workers, --file, --output, --hall-of-fame or --game-log")
+		if not checkpoint.is_checkpoint(args.store):
+			parser.error("--store must name a " + checkpoint.EXTENSION + " population file")
+		_train_store(args)
+		return
 
 	if args.file != None and args.output == None:
 		print("This will overwrite your input file with the new")
@@ -35,8 +337,24 @@ def main():
 		if confirmation != "Y" and confirmation != "Yes":
 			return
 
-	if args.file == None:
-		league.generate_pop()
+	current = league.League(args.engine)
+	current.use_precision(args.precision)
+
+	checkpoint_file = args.checkpoint_file
+	if not checkpoint.is_checkpoint(checkpoint_file):
+		checkpoint_file = checkpoint_file + checkpoint.EXTENSION
+
+	generation = 0
+	start = 0
+	if args.resume:
+		header = current.populate_from_checkpoint(checkpoint_file, restore_standings=True)
+		start = header["run_generation"]
+		generation = header["generation"] - start
+		checkpoint.set_rng_state(header["rng"])
+	elif args.file == None:
+		current.generate_pop()
+	elif checkpoint.is_checkpoint(args.file):
+		generation = current.populate_from_checkpoint(args.file)["generation"]
 	else:
 		filename = args.file
 		if not filename.lower().endswith(".json"):
@@ -45,28 +363,48 @@ def main():
 		with open(filename, "r") as f:
 			data = json.load(f)
 		
-		league.populate_from_export(data)
+		current.populate_from_export(data)
 
 
-	league.play_season()
-	for x in range(1, args.generations + 1):
-		if args.verbose:
-			print("Generation :", x)
-		league.repop_from(league.gather_top())
-		league.play_season()
+	rating = args.rating
+	if rating is None:
+		rating = "wins" if args.tournament in ("round-robin", "racing") else "elo"
+	rating = None if rating == "wins" else rating
+	if args.tournament == "swiss":
+		tournament = league.SwissTournament(args.rounds, rating)
+	elif args.tournament == "sampled":
+		tournament = league.SampledTournament(args.opponents, rating)
+	elif args.tournament == "racing":
+		tournament = league.RacingTournament(args.opponents, args.keep, args.confidence,\
+			rating=rating)
+	else:
+		tournament = league.RoundRobin(rating)
+
+	if args.islands > 0:
+		finished = islands.run(args.islands, args.generations, args.migrate_every,\
+			args.migrants, filename=args.file, batched=args.batched,\
+			tournament=tournament, match_cache=args.match_cache, move_memo=args.move_memo,\
+			engine=args.engine, precision=args.precision)
+		islands.populate_league(finished, current)
+	else:
+		_train(current, args, tournament, start, generation, checkpoint_file)
+	generation += args.generations
 
 	if args.output == None and args.file == None:
-		league.print_standings()
+		current.print_standings()
 	else:
 		#take output if there is one, if not take file
 		filename = next(name for name in \
 			(args.output, args.file) if name != None)
 
-		if not filename.lower().endswith(".json"):
-			filename = filename + ".json"
+		if checkpoint.is_checkpoint(filename):
+			current.save_checkpoint(filename, generation)
+		else:
+			if not filename.lower().endswith(".json"):
+				filename = filename + ".json"
 
-		with open(filename, "w") as f:
-			json.dump(league.export(), f)
+			with open(filename, "w") as f:
+				json.dump(current.export(), f)
 
 
 